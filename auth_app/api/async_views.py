@@ -0,0 +1,112 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import aauthenticate_request
+
+
+def set_token_cookie(response, key, value):
+    response.set_cookie(
+        key=key,
+        value=str(value),
+        httponly=True,
+        secure=True,
+        samesite='Lax'
+    )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """
+    Base class for async JSON endpoints served natively under ASGI.
+
+    Authenticates like the DRF views (access token cookie or Bearer header) and, like
+    DRF's APIView, is exempt from CSRF checks since authentication does not use sessions.
+    """
+    authentication_required = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authentication_required:
+            user = await aauthenticate_request(request)
+            if user is None:
+                return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+    def parse_json(self, request):
+        """
+        Return the JSON body of the request as a dict, or None if it cannot be parsed.
+        """
+        try:
+            data = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class AsyncLoginView(AsyncAPIView):
+    """
+    Async API endpoint for obtaining JWT access and refresh tokens.
+
+    Same request and response as CookieTokenObtainPairView, with the credential check done on the async ORM.
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        if not data or not data.get('username') or not data.get('password'):
+            return JsonResponse({"detail": "Username and password are required."}, status=401)
+
+        user = await aauthenticate(request, username=data['username'], password=data['password'])
+        if user is None:
+            return JsonResponse({"detail": "Invalid username or password."}, status=401)
+
+        refresh = RefreshToken.for_user(user)
+        response = JsonResponse({
+            "detail": "Login successfully.",
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email
+                }
+            })
+        set_token_cookie(response, 'access_token', refresh.access_token)
+        set_token_cookie(response, 'refresh_token', refresh)
+        return response
+
+
+class AsyncTokenRefreshView(AsyncAPIView):
+    """
+    Async API endpoint for refreshing JWT access tokens from the refresh token cookie.
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        refresh_token = request.COOKIES.get('refresh_token')
+        if refresh_token is None:
+            return JsonResponse({
+                "detail": "Refresh token not provided in cookies."
+            }, status=401)
+
+        serializer = TokenRefreshSerializer(data={'refresh': refresh_token})
+        try:
+            await sync_to_async(serializer.is_valid)(raise_exception=True)
+        except Exception:
+            return JsonResponse({
+                "detail": "Invalid refresh token."
+            }, status=400)
+
+        access = serializer.validated_data.get('access')
+        response = JsonResponse({
+            "detail": "Token refreshed",
+            "access": access
+            })
+        set_token_cookie(response, 'access_token', access)
+        return response
@@ -1,7 +1,130 @@
+import copy
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import User
 
+_user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+
+
+def get_version_cache():
+    return caches[settings.AUTH_USER_VERSION_CACHE]
+
+
+def _version_key(user_id):
+    return f'auth-user:{user_id}:version'
+
+
+def invalidate_user(user_id):
+    """
+    Drop every cached entry of a user. Called when the user is saved or deleted.
+
+    Bumping the user's version in the shared AUTH_USER_VERSION_CACHE also makes other
+    processes reload the user on their next request.
+    """
+    with _user_cache_lock:
+        for key in [key for key in _user_cache if key[0] == user_id]:
+            _user_cache.pop(key, None)
+    cache = get_version_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), 1, timeout=None)
+
+
+def _cached(key, version):
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+    if entry is None or entry[0] != version:
+        return None
+    return entry[1]
+
+
+def _store(key, version, user):
+    with _user_cache_lock:
+        _user_cache[key] = (version, user)
+
+
+def get_cached_user(access_token):
+    """
+    Return the user of a validated access token, or None if it no longer exists.
+
+    Users are kept in a short-lived in-process LRU cache keyed by user id and token id,
+    so repeated requests with the same token do not hit the database. An entry is only
+    used while the user's version in AUTH_USER_VERSION_CACHE is unchanged, and expires
+    after AUTH_USER_CACHE_TTL seconds in any case.
+    """
+    key = (access_token["user_id"], access_token.get("jti"))
+    version = get_version_cache().get_or_set(_version_key(key[0]), 0, timeout=None)
+    user = _cached(key, version)
+    if user is None:
+        user = User.objects.filter(id=key[0]).first()
+        if user is None:
+            return None
+        _store(key, version, user)
+    # Every request gets its own instance, so changes in one request never leak into another.
+    return copy.copy(user)
+
+
+async def aget_cached_user(access_token):
+    """
+    Async variant of `get_cached_user` using the async ORM and cache API on a cache miss.
+    """
+    key = (access_token["user_id"], access_token.get("jti"))
+    version = await get_version_cache().aget_or_set(_version_key(key[0]), 0, timeout=None)
+    user = _cached(key, version)
+    if user is None:
+        user = await User.objects.filter(id=key[0]).afirst()
+        if user is None:
+            return None
+        _store(key, version, user)
+    return copy.copy(user)
+
+
+def decode_access_token(request, raw_token):
+    """
+    Validate a raw access token once per request and return it, or None if it is invalid.
+    Accepts DRF requests as well as plain Django requests.
+    """
+    http_request = getattr(request, '_request', request)
+    decoded = http_request.__dict__.setdefault('_decoded_access_tokens', {})
+    if raw_token not in decoded:
+        try:
+            decoded[raw_token] = AccessToken(raw_token)
+        except Exception:
+            decoded[raw_token] = None
+    return decoded[raw_token]
+
+
+async def aauthenticate_request(request):
+    """
+    Authenticate a plain Django request for async views from the access token cookie
+    or an `Authorization: Bearer` header. Returns the user or None.
+    """
+    raw_token = request.COOKIES.get('access_token')
+    if not raw_token:
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            raw_token = header[len('Bearer '):]
+    if not raw_token:
+        return None
+
+    access_token = decode_access_token(request, raw_token)
+    if access_token is None:
+        return None
+    user = await aget_cached_user(access_token)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
 class CookieTokenAuthentication(BaseAuthentication):
     """
     Custom authentication class that retrieves the JWT token from cookies.
@@ -13,10 +136,40 @@ class CookieTokenAuthentication(BaseAuthentication):
             return None
 
         try:
-            access_token = AccessToken(token)
-            user_id = access_token["user_id"]
-            user = User.objects.get(id=user_id)
+            access_token = decode_access_token(request, token)
+            if access_token is None:
+                return None
+            user = get_cached_user(access_token)
+            if user is None or not user.is_active:
+                return None
             return (user, access_token)
-        
+
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Header based JWT authentication that shares the per-request token decode
+    and the user cache with CookieTokenAuthentication.
+    """
+
+    def authenticate(self, request):
+        self._request = request
+        return super().authenticate(request)
+
+    def get_validated_token(self, raw_token):
+        if isinstance(raw_token, bytes):
+            raw_token = raw_token.decode()
+        access_token = decode_access_token(self._request, raw_token)
+        if access_token is None:
+            return super().get_validated_token(raw_token)
+        return access_token
+
+    def get_user(self, validated_token):
+        user = get_cached_user(validated_token)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework.authtoken.views import obtain_auth_token
 from .views import RegistrationView, CookieTokenObtainPairView, CookieTokenRefreshView, LogoutView
+from .async_views import AsyncLoginView, AsyncTokenRefreshView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -10,5 +11,7 @@ urlpatterns = [
     path('register/', RegistrationView.as_view(), name='registration'),
     path('login/', CookieTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', CookieTokenRefreshView.as_view(), name='token_refresh'),
-    path('logout/', LogoutView.as_view(), name='logout')
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('async/login/', AsyncLoginView.as_view(), name='async_token_obtain_pair'),
+    path('async/token/refresh/', AsyncTokenRefreshView.as_view(), name='async_token_refresh'),
 ]
\ No newline at end of file
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class AuthAppConfig(AppConfig):
-    name = 'auth_app'
\ No newline at end of file
+    name = 'auth_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
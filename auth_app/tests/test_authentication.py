@@ -0,0 +1,37 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..api import authentication
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        authentication._user_cache.clear()
+        authentication.get_version_cache().clear()
+        self.user = User.objects.create_user(username='alice', password='secret')
+        self.token = AccessToken.for_user(self.user)
+
+    def bump_version_elsewhere(self):
+        # What another process does on save: only the shared version changes, not this process' entries.
+        authentication.get_version_cache().incr(authentication._version_key(self.user.pk))
+
+    def test_cached_user_is_reused(self):
+        authentication.get_cached_user(self.token)
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.get_cached_user(self.token).pk, self.user.pk)
+
+    def test_version_change_reloads_the_user(self):
+        authentication.get_cached_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.bump_version_elsewhere()
+
+        self.assertFalse(authentication.get_cached_user(self.token).is_active)
+        self.assertFalse(async_to_sync(authentication.aget_cached_user)(self.token).is_active)
+
+    def test_save_invalidates(self):
+        authentication.get_cached_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(authentication.get_cached_user(self.token).is_active)
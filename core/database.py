@@ -0,0 +1,74 @@
+"""
+Environment driven database configuration for core project.
+
+DB_ENGINE selects the backend:
+
+    sqlite    (default) SQLite file, tuned for concurrent access: WAL journal,
+              synchronous=NORMAL, busy_timeout and mmap_size are applied to every
+              new connection, and writers take the lock at BEGIN (IMMEDIATE) so
+              they queue instead of failing with "database is locked".
+    postgres  PostgreSQL with persistent connections (CONN_MAX_AGE) and health checks.
+"""
+
+import os
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default=str(default)) == "True"
+
+
+def sqlite_pragmas(wal=True, busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024):
+    """
+    Return the PRAGMA statements executed on every new SQLite connection.
+    """
+    pragmas = [f"PRAGMA busy_timeout={busy_timeout_ms}", "PRAGMA foreign_keys=ON"]
+    if wal:
+        pragmas += ["PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL"]
+    pragmas += [f"PRAGMA mmap_size={mmap_size}", f"PRAGMA cache_size=-{cache_size_kib}"]
+    return pragmas
+
+
+def sqlite_config(base_dir):
+    busy_timeout_ms = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", default="5000"))
+    pragmas = sqlite_pragmas(
+        wal=_env_bool("SQLITE_WAL", True),
+        busy_timeout_ms=busy_timeout_ms,
+        mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", default=str(256 * 1024 * 1024))),
+    )
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv("SQLITE_PATH", default=str(base_dir / 'db.sqlite3')),
+        'OPTIONS': {
+            'init_command': "; ".join(pragmas) + ";",
+            'transaction_mode': os.getenv("SQLITE_TRANSACTION_MODE", default="IMMEDIATE"),
+            'timeout': busy_timeout_ms / 1000,
+        },
+    }
+
+
+def postgres_config():
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv("POSTGRES_DB", default="quizzly"),
+        'USER': os.getenv("POSTGRES_USER", default="quizzly"),
+        'PASSWORD': os.getenv("POSTGRES_PASSWORD", default=""),
+        'HOST': os.getenv("POSTGRES_HOST", default="localhost"),
+        'PORT': os.getenv("POSTGRES_PORT", default="5432"),
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", default="600")),
+        'CONN_HEALTH_CHECKS': _env_bool("DB_CONN_HEALTH_CHECKS", True),
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv("POSTGRES_CONNECT_TIMEOUT", default="5")),
+        },
+    }
+
+
+def database_config(base_dir):
+    """
+    Return the DATABASES['default'] entry for the engine selected by DB_ENGINE.
+    """
+    engine = os.getenv("DB_ENGINE", default="sqlite")
+    if engine == "sqlite":
+        return sqlite_config(base_dir)
+    if engine == "postgres":
+        return postgres_config()
+    raise ValueError(f"Unsupported DB_ENGINE: {engine}")
@@ -0,0 +1,20 @@
+import os
+
+ROLE_SETTINGS = {
+    'all': 'core.settings',
+    'api': 'core.settings_api',
+    'worker': 'core.settings_worker',
+}
+
+
+def settings_module():
+    """
+    Return the settings module for the process role in QUIZZLY_ROLE.
+
+    `all` (default) serves HTTP and generates quizzes in one process, `api` only serves
+    HTTP and queues jobs, `worker` runs the queued jobs (see `manage.py run_quiz_worker`).
+    """
+    role = os.getenv('QUIZZLY_ROLE', 'all')
+    if role not in ROLE_SETTINGS:
+        raise ValueError(f"Unknown QUIZZLY_ROLE {role!r}, expected one of {', '.join(ROLE_SETTINGS)}")
+    return ROLE_SETTINGS[role]
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from .database import database_config
 
 load_dotenv()
 
@@ -93,11 +94,10 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# DB_ENGINE=sqlite (default, WAL tuned) or DB_ENGINE=postgres, see core/database.py.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
 
@@ -141,13 +141,182 @@ STATIC_URL = 'static/'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'auth_app.api.authentication.CookieTokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_app.api.authentication.CachedJWTAuthentication',
     )
 }
 
+# Authenticated users are cached in-process for a short time instead of being loaded on every request.
+# Saving or deleting a user bumps its version in AUTH_USER_VERSION_CACHE, which every cache hit checks.
+# With the default locmem backends that version is per process, so other processes may serve a changed
+# user for up to AUTH_USER_CACHE_TTL seconds; keep it well below ACCESS_TOKEN_LIFETIME, or use a shared
+# cache (QUIZ_CACHE_BACKEND=file or db) to invalidate everywhere at once.
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", default="60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", default="10000"))
+AUTH_USER_VERSION_CACHE = os.getenv("AUTH_USER_VERSION_CACHE", default="quizzes")
+
+QUIZ_PAGE_SIZE = int(os.getenv("QUIZ_PAGE_SIZE", default="20"))
+
+
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# QUIZ_CACHE_BACKEND selects where serialized quiz responses are kept: "locmem" (default),
+# "file" (QUIZ_CACHE_LOCATION directory) or "db" (run `python manage.py createcachetable` first).
+
+QUIZ_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+}
+QUIZ_CACHE_BACKEND = os.getenv("QUIZ_CACHE_BACKEND", default="locmem")
+QUIZ_CACHE_LOCATIONS = {
+    "locmem": "quiz-responses",
+    "file": os.getenv("QUIZ_CACHE_LOCATION", default=str(BASE_DIR / "cache" / "quizzes")),
+    "db": "quiz_response_cache",
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'quizzes': {
+        'BACKEND': QUIZ_CACHE_BACKENDS[QUIZ_CACHE_BACKEND],
+        'LOCATION': QUIZ_CACHE_LOCATIONS[QUIZ_CACHE_BACKEND],
+    },
+}
+
+QUIZ_RESPONSE_CACHE = 'quizzes'
+QUIZ_RESPONSE_CACHE_TIMEOUT = int(os.getenv("QUIZ_RESPONSE_CACHE_TIMEOUT", default="3600"))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
+
+# Transcription
+# Whisper models are loaded once per worker process and shared between threads.
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", default="faster-whisper")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", default="turbo")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", default="cpu")
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", default="5"))
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", default="False") == "True"
+
+# faster-whisper only: int8 quantization is the fastest option on CPU-only hosts.
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", default="int8")
+FASTER_WHISPER_VAD_FILTER = os.getenv("FASTER_WHISPER_VAD_FILTER", default="True") == "True"
+FASTER_WHISPER_CPU_THREADS = int(os.getenv("FASTER_WHISPER_CPU_THREADS", default="0"))
+FASTER_WHISPER_NUM_WORKERS = int(os.getenv("FASTER_WHISPER_NUM_WORKERS", default="1"))
+
+# Process role
+# Set by the role specific settings modules, see core/roles.py.
+
+QUIZZLY_ROLE = "all"
+
+# Quiz jobs
+# When enabled, createQuiz/ answers with 202 and a job id and the pipeline runs in a local process pool.
+# With QUIZ_JOB_DISPATCH=queue jobs stay in the database until a `run_quiz_worker` process claims them.
+
+QUIZ_ASYNC_CREATION = os.getenv("QUIZ_ASYNC_CREATION", default="True") == "True"
+QUIZ_JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", default="2"))
+QUIZ_JOB_DISPATCH = os.getenv("QUIZ_JOB_DISPATCH", default="local")
+QUIZ_WORKER_POLL_SECONDS = float(os.getenv("QUIZ_WORKER_POLL_SECONDS", default="2"))
+# Running jobs send a heartbeat; jobs without one for QUIZ_JOB_STALE_SECONDS are requeued.
+QUIZ_JOB_HEARTBEAT_SECONDS = float(os.getenv("QUIZ_JOB_HEARTBEAT_SECONDS", default="30"))
+QUIZ_JOB_STALE_SECONDS = int(os.getenv("QUIZ_JOB_STALE_SECONDS", default="180"))
+# How often createQuiz/stream/ checks its job for new progress and questions.
+QUIZ_STREAM_POLL_SECONDS = float(os.getenv("QUIZ_STREAM_POLL_SECONDS", default="0.5"))
+# Upper bound on the videos of one createQuiz/batch/ request, playlists included.
+QUIZ_BATCH_MAX_ITEMS = int(os.getenv("QUIZ_BATCH_MAX_ITEMS", default="50"))
+
+# Transcript cache
+# Transcripts are stored per canonical YouTube video id and model, so repeated quizzes skip download and Whisper.
+
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", default="True") == "True"
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", default=str(30 * 24 * 60 * 60)))
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", default=str(512 * 1024 * 1024)))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", default="10000"))
+
+# Audio ingest
+# "download" stores the compressed audio in a temporary file before transcription, "stream" decodes
+# the remote stream to 16 kHz PCM and transcribes it window by window while it is being fetched.
+
+AUDIO_INGEST_MODE = os.getenv("AUDIO_INGEST_MODE", default="download")
+STREAMING_WINDOW_SECONDS = int(os.getenv("STREAMING_WINDOW_SECONDS", default="60"))
+
+# Ingest limits
+# Video metadata is checked before any audio is fetched. Videos longer than INGEST_MAX_DURATION_SECONDS
+# are clipped to their first part (INGEST_OVER_LIMIT=clip) or rejected (INGEST_OVER_LIMIT=reject).
+
+INGEST_AUDIO_FORMAT = os.getenv("INGEST_AUDIO_FORMAT", default="bestaudio[abr<=64]/worstaudio/bestaudio/best")
+INGEST_MAX_DURATION_SECONDS = int(os.getenv("INGEST_MAX_DURATION_SECONDS", default="10800"))
+INGEST_OVER_LIMIT = os.getenv("INGEST_OVER_LIMIT", default="clip")
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", default=str(500 * 1024 * 1024)))
+
+# Long audio
+# Recordings longer than the threshold are cut at their quietest points into overlapping windows and
+# transcribed in parallel, one model per process. LONG_AUDIO_PROCESSES is the total for the host and is
+# split between the QUIZ_JOB_WORKERS job workers; a share above 1 per worker enables it.
+
+LONG_AUDIO_PROCESSES = int(os.getenv("LONG_AUDIO_PROCESSES", default="1"))
+LONG_AUDIO_THRESHOLD_SECONDS = int(os.getenv("LONG_AUDIO_THRESHOLD_SECONDS", default="900"))
+LONG_AUDIO_WINDOW_SECONDS = int(os.getenv("LONG_AUDIO_WINDOW_SECONDS", default="300"))
+LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("LONG_AUDIO_OVERLAP_SECONDS", default="2"))
+
+# Audio preprocessing
+# Cuts silence and non-speech out of the audio before transcription and can speed up speech.
+# Streamed audio is preprocessed window by window. Segment timestamps are mapped back to the original recording.
+
+AUDIO_PREPROCESSING = os.getenv("AUDIO_PREPROCESSING", default="False") == "True"
+AUDIO_VAD = os.getenv("AUDIO_VAD", default="silero")
+AUDIO_MIN_SILENCE_SECONDS = float(os.getenv("AUDIO_MIN_SILENCE_SECONDS", default="0.5"))
+AUDIO_SPEECH_PAD_SECONDS = float(os.getenv("AUDIO_SPEECH_PAD_SECONDS", default="0.2"))
+AUDIO_SPEED = float(os.getenv("AUDIO_SPEED", default="1.0"))
+
+# Quiz generation
+# Transcripts above the threshold are condensed chunk by chunk (map) before the questions are generated (reduce).
+
+GENAI_API_KEY = os.getenv("GENAI_API_KEY", default="unsecure-key")
+GENAI_MODEL = os.getenv("GENAI_MODEL", default="gemini-2.5-flash")
+# Point GENAI_BASE_URL at a local stub server to run without the real API.
+GENAI_BASE_URL = os.getenv("GENAI_BASE_URL", default=None)
+GENERATION_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("GENERATION_MAP_REDUCE_THRESHOLD_TOKENS", default="30000"))
+GENERATION_CHUNK_TOKENS = int(os.getenv("GENERATION_CHUNK_TOKENS", default="8000"))
+GENERATION_MAP_CONCURRENCY = int(os.getenv("GENERATION_MAP_CONCURRENCY", default="4"))
+# Structured output constrains the response to the quiz schema; invalid quizzes are sent back for repair.
+GENERATION_STRUCTURED_OUTPUT = os.getenv("GENERATION_STRUCTURED_OUTPUT", default="True") == "True"
+GENERATION_STREAM = os.getenv("GENERATION_STREAM", default="True") == "True"
+GENERATION_REPAIR_ATTEMPTS = int(os.getenv("GENERATION_REPAIR_ATTEMPTS", default="2"))
+
+# LLM gateway
+# Limits shared by every Gemini call of a process.
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", default="120"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", default="300"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", default="8"))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", default="60"))
+LLM_BURST = int(os.getenv("LLM_BURST", default="10"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", default="4"))
+
+# Metrics
+# /metrics is disabled unless METRICS_ENABLED is set. With METRICS_DIR set, every process writes its
+# metrics there and /metrics adds them up; files of processes that are gone are removed at startup.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", default="False") == "True"
+METRICS_DIR = os.getenv("METRICS_DIR", default=str(BASE_DIR / "cache" / "metrics"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", default="")
+
+# Async views
+# Threads available to async views for blocking work such as downloads and transcription.
+
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", default="4"))
+
+# Single-flight
+# Identical quiz generations running at the same time share one transcription and LLM run.
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", default="True") == "True"
+SINGLE_FLIGHT_LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", default="300"))
+SINGLE_FLIGHT_RESULT_TTL = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL", default="600"))
+SINGLE_FLIGHT_WAIT_SECONDS = int(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", default="1800"))
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", default="1"))
@@ -0,0 +1,12 @@
+"""
+Settings for the API role: serves HTTP only and never loads ML models.
+
+Quizzes are always created as jobs and left in the database for `run_quiz_worker` processes.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+QUIZZLY_ROLE = "api"
+QUIZ_ASYNC_CREATION = True
+QUIZ_JOB_DISPATCH = "queue"
+WHISPER_PRELOAD = False
@@ -0,0 +1,8 @@
+"""
+Settings for the worker role: runs queued quiz jobs with `manage.py run_quiz_worker`.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+QUIZZLY_ROLE = "worker"
+QUIZ_JOB_DISPATCH = "queue"
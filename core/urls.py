@@ -17,9 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from quiz_app.api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls')),
     path('api/', include('auth_app.api.urls')),
     path('api/', include('quiz_app.api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
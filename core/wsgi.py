@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 
 import os
 
+from core.roles import settings_module
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module())
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Resubmit quiz jobs that a previous server process left unfinished and drop metrics of exited processes.
+from quiz_app.services.metrics import registry  # noqa: E402
+from quiz_app.services.jobs import start_job_recovery  # noqa: E402
+
+registry.prune()
+start_job_recovery()
\ No newline at end of file
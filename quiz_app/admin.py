@@ -1,8 +1,29 @@
 from django.contrib import admin
-from .models import Quiz
+from .models import Quiz, QuizBatch, QuizJob, Transcript
 
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'creator', 'created_at', 'updated_at')
     search_fields = ('title', 'description', 'creator__username')
     list_filter = ('created_at', 'updated_at')
+
+
+@admin.register(QuizJob)
+class QuizJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'video_url', 'creator', 'status', 'stage', 'progress', 'created_at')
+    search_fields = ('video_url', 'creator__username')
+    list_filter = ('status', 'stage', 'created_at')
+
+
+@admin.register(QuizBatch)
+class QuizBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'playlist_url', 'creator', 'created_at')
+    search_fields = ('title', 'playlist_url', 'creator__username')
+    list_filter = ('created_at',)
+
+
+@admin.register(Transcript)
+class TranscriptAdmin(admin.ModelAdmin):
+    list_display = ('id', 'video_id', 'model_name', 'size_bytes', 'hits', 'created_at', 'last_accessed_at')
+    search_fields = ('video_id', 'model_name')
+    list_filter = ('model_name', 'created_at')
@@ -0,0 +1,145 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from auth_app.api.async_views import AsyncAPIView
+from .pagination import QuizCursorPagination
+from .serializers import QuizSerializer, QuizJobSerializer
+from .streaming import job_events
+from ..models import QuizJob
+from ..querysets import QUIZ_FIELDS, questions_prefetch, user_quizzes
+from ..services.ingest import IngestRejected
+from ..services.jobs import submit_job
+from ..services.video import normalize_video_url
+
+
+def quiz_queryset(request, with_questions=True):
+    queryset = user_quizzes(request.user).only(*QUIZ_FIELDS).order_by('-created_at', '-id')
+    if with_questions:
+        queryset = queryset.prefetch_related(questions_prefetch())
+    return queryset
+
+
+class AsyncQuizCreateView(AsyncAPIView):
+    """
+    Async API endpoint for creating Quizzes.
+
+    Same contract as QuizCreateView. When quizzes are generated inside the request,
+    the download and transcription run in a thread pool and the Gemini calls are
+    awaited, so a single ASGI process can hold many slow generations at once.
+    """
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return JsonResponse({"detail": "Invalid JSON body."}, status=400)
+
+        serializer = QuizSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        url = normalize_video_url(serializer.validated_data["video_url"])
+        time_range = QuizSerializer.time_range(serializer.validated_data)
+
+        if settings.QUIZ_ASYNC_CREATION:
+            job = await QuizJob.objects.acreate(
+                creator=request.user,
+                video_url=url,
+                start_seconds=serializer.validated_data.get("start_seconds"),
+                end_seconds=serializer.validated_data.get("end_seconds"),
+            )
+            submit_job(job.pk)
+            return JsonResponse(QuizJobSerializer(job).data, status=202)
+
+        from ..services.pipeline import arun_pipeline
+
+        try:
+            quiz = await arun_pipeline(url, request.user, time_range=time_range)
+        except IngestRejected as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+        quiz = await quiz_queryset(request).aget(pk=quiz.pk)
+        return JsonResponse(QuizSerializer(quiz).data, status=201)
+
+
+class AsyncQuizStreamView(AsyncAPIView):
+    """
+    API endpoint for creating a Quiz while watching it being generated.
+
+    Takes the same body as QuizCreateView, queues a QuizJob like it and answers with a
+    `text/event-stream` of the job's stages, each question as soon as it is saved and
+    the final quiz. The quiz is generated by the job workers, not in this process.
+
+    Needs an ASGI server: the stream is an async generator that waits between polls
+    without holding a thread, which a WSGI worker cannot serve.
+    """
+
+    async def post(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"detail": "Streaming quiz creation needs an ASGI server."}, status=501)
+
+        data = self.parse_json(request)
+        if data is None:
+            return JsonResponse({"detail": "Invalid JSON body."}, status=400)
+
+        serializer = QuizSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        job = await QuizJob.objects.acreate(
+            creator=request.user,
+            video_url=normalize_video_url(serializer.validated_data["video_url"]),
+            start_seconds=serializer.validated_data.get("start_seconds"),
+            end_seconds=serializer.validated_data.get("end_seconds"),
+        )
+        submit_job(job.pk)
+
+        async def load_quiz(quiz_id):
+            quiz = await quiz_queryset(request).filter(pk=quiz_id).afirst()
+            return None if quiz is None else QuizSerializer(quiz).data
+
+        response = StreamingHttpResponse(job_events(job.pk, load_quiz), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class AsyncQuizListView(AsyncAPIView):
+    """
+    Async API endpoint listing the authenticated user's quizzes, newest first.
+
+    Same response as the regular quiz list: pages of QUIZ_PAGE_SIZE quizzes in a
+    `next` / `previous` / `results` envelope, addressed by the same `?cursor=`, with
+    the same `?fields=` / `?include=` selection.
+    """
+
+    async def get(self, request):
+        selected = QuizSerializer.selected_fields(request)
+        queryset = quiz_queryset(request, with_questions=selected is None or 'questions' in selected)
+
+        paginator = QuizCursorPagination()
+        try:
+            quizzes = await sync_to_async(paginator.paginate_queryset)(queryset, Request(request))
+        except NotFound as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=404)
+        serializer = QuizSerializer(quizzes, many=True, context={'request': request})
+        return JsonResponse({
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": serializer.data,
+        })
+
+
+class AsyncQuizDetailView(AsyncAPIView):
+    """
+    Async API endpoint returning a single quiz of the authenticated user.
+    """
+
+    async def get(self, request, pk):
+        selected = QuizSerializer.selected_fields(request)
+        queryset = quiz_queryset(request, with_questions=selected is None or 'questions' in selected)
+        quiz = await queryset.filter(pk=pk).afirst()
+        if quiz is None:
+            return JsonResponse({"detail": "No Quiz matches the given query."}, status=404)
+        return JsonResponse(QuizSerializer(quiz, context={'request': request}).data)
@@ -0,0 +1,111 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..querysets import user_quizzes
+
+
+def get_cache():
+    return caches[settings.QUIZ_RESPONSE_CACHE]
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix('W/') for candidate in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def _generation_key(user_id):
+    return f'quizzes:{user_id}:generation'
+
+
+def user_generation(user_id):
+    """
+    Return the cache generation of a user's quizzes; bumping it orphans all cached payloads.
+    """
+    return get_cache().get_or_set(_generation_key(user_id), 0, timeout=None)
+
+
+def invalidate_user_quizzes(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.set(_generation_key(user_id), 1, timeout=None)
+
+
+class ConditionalQuizCacheMixin:
+    """
+    Conditional GET and payload caching for the quiz list and detail endpoints.
+
+    The ETag is derived from the quiz rows themselves (updated_at and count of the quizzes
+    and of their questions) plus the query string, and is computed with one aggregate query.
+    A matching If-None-Match returns 304 without serializing anything; otherwise the
+    serialized payload is served from the QUIZ_RESPONSE_CACHE cache when present.
+    Cached payloads are dropped when a quiz is updated or deleted.
+    """
+
+    def _version(self, queryset):
+        return queryset.aggregate(
+            quizzes=Count('id', distinct=True),
+            updated=Max('updated_at'),
+            question_count=Count('questions'),
+            questions_updated=Max('questions__updated_at'),
+        )
+
+    def _cached_response(self, request, scope, version, render):
+        user_id = request.user.pk
+        # Paginated payloads hold absolute next/previous links, so scheme and host are part of the key.
+        etag = make_etag(scope, user_id, request.build_absolute_uri(), *sorted(version.items()))
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache = get_cache()
+            key = f'quizzes:{user_id}:{user_generation(user_id)}:{etag}'
+            data = cache.get(key)
+            if data is None:
+                response = render()
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, timeout=settings.QUIZ_RESPONSE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        version = self._version(user_quizzes(request.user))
+        return self._cached_response(request, 'list', version, lambda: super(ConditionalQuizCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            version = self._version(user_quizzes(request.user).filter(pk=kwargs[self.lookup_field]))
+        except (TypeError, ValueError):
+            version = None
+        if not version or not version['quizzes']:
+            return super().retrieve(request, *args, **kwargs)
+        return self._cached_response(request, 'detail', version, lambda: super(ConditionalQuizCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_user_quizzes(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_user_quizzes(self.request.user.pk)
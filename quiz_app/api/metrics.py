@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from ..services.metrics import registry, render
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expose pipeline metrics in the Prometheus text format.
+
+    Returns 404 unless METRICS_ENABLED is set. When METRICS_TOKEN is set, scrapers must
+    send it as `Authorization: Bearer <token>`.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(header, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponse(status=401)
+    return HttpResponse(render(registry.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
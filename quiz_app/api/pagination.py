@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Keyset pagination for quiz lists, newest first.
+
+    Pages are addressed by an opaque cursor on (created_at, id), so the cost of a page
+    does not depend on how many quizzes come before it.
+    """
+    page_size = settings.QUIZ_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from ..models import Quiz, Question
+from django.conf import settings
+from ..models import Quiz, Question, QuizBatch, QuizJob
 from django.contrib.auth import get_user_model
 
 class QuestionSerializer(serializers.ModelSerializer):
@@ -20,10 +21,67 @@ class QuizSerializer(serializers.ModelSerializer):
     """
     Serializer for Quiz objects.
     Handles validation and serialization of Quiz data.
+
+    On read requests the fields can be narrowed with `?fields=id,title,...`;
+    questions are only kept in that case if they are listed or `?include=questions` is given.
+    On creation, `start_seconds` / `end_seconds` limit the quiz to a part of the video.
     """
     url = serializers.URLField(source='video_url', write_only=True)
+    start_seconds = serializers.FloatField(write_only=True, required=False, min_value=0)
+    end_seconds = serializers.FloatField(write_only=True, required=False, min_value=0)
     questions = QuestionSerializer(many=True, read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        selected = self.selected_fields(request)
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+    @staticmethod
+    def selected_fields(request):
+        """
+        Return the field names requested via query parameters, or None to keep all fields.
+        """
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get('fields')
+        if not fields:
+            return None
+        selected = {name.strip() for name in fields.split(',') if name.strip()}
+        include = params.get('include', '')
+        if 'questions' in {name.strip() for name in include.split(',')}:
+            selected.add('questions')
+        return selected
+
+    @staticmethod
+    def time_range(validated_data):
+        """
+        Return the requested (start, end) seconds, or None for the whole video.
+        """
+        start, end = validated_data.get('start_seconds'), validated_data.get('end_seconds')
+        if start is None and end is None:
+            return None
+        return (start or 0, end)
+
+    def validate(self, attrs):
+        start, end = attrs.get('start_seconds'), attrs.get('end_seconds')
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError({'end_seconds': 'Must be greater than start_seconds.'})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data.pop('start_seconds', None)
+        validated_data.pop('end_seconds', None)
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        validated_data.pop('start_seconds', None)
+        validated_data.pop('end_seconds', None)
+        return super().update(instance, validated_data)
+
     class Meta:
         model = Quiz
         fields = ['id', 
@@ -32,6 +90,91 @@ class QuizSerializer(serializers.ModelSerializer):
                   'created_at', 
                   'updated_at',
                   'url',
+                  'start_seconds',
+                  'end_seconds',
                   'video_url',
                   'questions']
-        read_only_fields = ['video_url']
\ No newline at end of file
+        read_only_fields = ['video_url']
+
+
+class QuizJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for QuizJob objects.
+    Reports the current stage and progress of a quiz generation job and,
+    once it has succeeded, the generated quiz.
+    """
+    quiz = QuizSerializer(read_only=True)
+
+    class Meta:
+        model = QuizJob
+        fields = ['id',
+                  'video_url',
+                  'start_seconds',
+                  'end_seconds',
+                  'status',
+                  'stage',
+                  'progress',
+                  'error',
+                  'quiz',
+                  'created_at',
+                  'updated_at',
+                  'started_at',
+                  'finished_at']
+        read_only_fields = fields
+
+    def to_representation(self, job):
+        data = super().to_representation(job)
+        # A streamed quiz is only shown once all of its questions are there.
+        if job.quiz is not None and not job.quiz.ready:
+            data['quiz'] = None
+        return data
+
+
+class QuizBatchSerializer(serializers.ModelSerializer):
+    """
+    Serializer for QuizBatch objects.
+    Accepts either a list of `video_urls` or a `playlist_url` and reports every
+    video of the batch as a job, with a count of the jobs per status. For playlists,
+    `playlist` has the status and error of the job that reads the playlist.
+    """
+    video_urls = serializers.ListField(
+        child=serializers.URLField(),
+        write_only=True,
+        required=False,
+        allow_empty=False,
+        max_length=settings.QUIZ_BATCH_MAX_ITEMS,
+    )
+    jobs = QuizJobSerializer(source='video_jobs', many=True, read_only=True)
+    summary = serializers.SerializerMethodField()
+    playlist = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizBatch
+        fields = ['id',
+                  'title',
+                  'playlist_url',
+                  'playlist',
+                  'video_urls',
+                  'summary',
+                  'jobs',
+                  'created_at',
+                  'updated_at']
+        read_only_fields = ['title', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        if bool(data.get('video_urls')) == bool(data.get('playlist_url')):
+            raise serializers.ValidationError('Provide either video_urls or playlist_url.')
+        return data
+
+    def get_summary(self, batch):
+        summary = {status: 0 for status in QuizJob.Status.values}
+        for job in batch.video_jobs:
+            summary[job.status] += 1
+        summary['total'] = sum(summary.values())
+        return summary
+
+    def get_playlist(self, batch):
+        job = batch.playlist_job
+        if job is None:
+            return None
+        return {'status': job.status, 'error': job.error}
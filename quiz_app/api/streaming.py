@@ -0,0 +1,78 @@
+import asyncio
+import json
+import time
+
+from django.conf import settings
+
+from ..models import Question, QuizJob
+
+# Comment lines keep proxies from closing the connection while a stage is silent.
+KEEPALIVE_SECONDS = 15
+
+
+def sse_event(event, data):
+    """
+    Format one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def job_events(job_id, load_quiz):
+    """
+    Follow a quiz job in the database and yield its progress as SSE messages.
+
+    The job runs in the job pool or a `run_quiz_worker` process like any other; this
+    only polls its row every QUIZ_STREAM_POLL_SECONDS, on the async ORM so an open
+    stream does not hold a thread. Emits `stage` events ({"stage", "progress"}), a
+    `question` event with its 1-based `index` for every question saved so far, and
+    finally either `quiz` with `await load_quiz(quiz_id)` or `error` with a "detail"
+    message. If the response had to be repaired, the questions are sent again from
+    index 1 and the `quiz` event has the final version.
+    """
+    last_state = None
+    last_question_id = 0
+    last_sent = time.monotonic()
+
+    while True:
+        job = await QuizJob.objects.filter(pk=job_id).values("status", "stage", "progress", "quiz_id", "error").afirst()
+        if job is None:
+            yield sse_event("error", {"detail": "The quiz job no longer exists."})
+            return
+
+        messages = []
+        state = (job["stage"], job["progress"])
+        if state != last_state:
+            last_state = state
+            messages.append(sse_event("stage", {"stage": job["stage"], "progress": job["progress"]}))
+
+        if job["quiz_id"] is not None:
+            questions = [
+                question async for question in Question.objects.filter(quiz_id=job["quiz_id"])
+                .order_by("id")
+                .values("id", "question_title", "question_options", "answer")
+            ]
+            for index, question in enumerate(questions, start=1):
+                if question["id"] > last_question_id:
+                    messages.append(sse_event("question", {"index": index, **question}))
+            if questions:
+                last_question_id = questions[-1]["id"]
+
+        if job["status"] == QuizJob.Status.SUCCEEDED:
+            quiz = await load_quiz(job["quiz_id"]) if job["quiz_id"] is not None else None
+            if quiz is None:
+                messages.append(sse_event("error", {"detail": "The quiz of this job no longer exists."}))
+            else:
+                messages.append(sse_event("quiz", quiz))
+        elif job["status"] == QuizJob.Status.FAILED:
+            messages.append(sse_event("error", {"detail": job["error"] or "Quiz generation failed."}))
+
+        if messages:
+            yield "".join(messages)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+
+        if job["status"] in (QuizJob.Status.SUCCEEDED, QuizJob.Status.FAILED):
+            return
+        await asyncio.sleep(settings.QUIZ_STREAM_POLL_SECONDS)
@@ -1,11 +1,25 @@
 from django.urls import path, include
-from .views import QuizCreateView, QuizViewSet
+from .views import (
+    QuizBatchCreateView,
+    QuizBatchDetailView,
+    QuizCreateView,
+    QuizJobDetailView,
+    QuizViewSet,
+)
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncQuizCreateView, AsyncQuizDetailView, AsyncQuizListView, AsyncQuizStreamView
 
 router = DefaultRouter()
 router.register(r'quizzes', QuizViewSet, basename='quiz')
 
 urlpatterns = [
+    path('quizzes/jobs/<int:pk>/', QuizJobDetailView.as_view(), name='quiz-job-detail'),
+    path('quizzes/batches/<int:pk>/', QuizBatchDetailView.as_view(), name='quiz-batch-detail'),
     path('', include(router.urls)),
     path('createQuiz/', QuizCreateView.as_view(), name='quiz-create'),
+    path('createQuiz/stream/', AsyncQuizStreamView.as_view(), name='quiz-create-stream'),
+    path('createQuiz/batch/', QuizBatchCreateView.as_view(), name='quiz-create-batch'),
+    path('async/createQuiz/', AsyncQuizCreateView.as_view(), name='async-quiz-create'),
+    path('async/quizzes/', AsyncQuizListView.as_view(), name='async-quiz-list'),
+    path('async/quizzes/<int:pk>/', AsyncQuizDetailView.as_view(), name='async-quiz-detail'),
 ]
\ No newline at end of file
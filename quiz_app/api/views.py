@@ -1,116 +1,122 @@
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
-from .serializers import QuizSerializer
-from ..models import Quiz
-import whisper
-from google import genai
-import json, re
+from .caching import ConditionalQuizCacheMixin
+from .pagination import QuizCursorPagination
+from .serializers import QuizBatchSerializer, QuizSerializer, QuizJobSerializer
+from django.db.models import Prefetch
+from ..models import Quiz, QuizBatch, QuizJob
+from ..querysets import QUIZ_FIELDS, questions_prefetch, user_quizzes
+from ..services.ingest import IngestRejected
+from ..services.jobs import create_batch, create_playlist_batch, enqueue_job
+from ..services.video import normalize_video_url
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import mixins, viewsets
-import os
-from dotenv import load_dotenv
-load_dotenv()
 
 class QuizCreateView(generics.CreateAPIView):
     """
     API endpoint for creating Quizzes.
-    Accepts a video URL, processes the video to generate a quiz using transcription and AI,
-    and returns the created Quiz object with its questions.
+    Accepts a video URL, processes the video to generate a quiz using transcription and AI.
+    By default the work is queued as a QuizJob and the job is returned with status 202;
+    with QUIZ_ASYNC_CREATION disabled the created Quiz is returned directly.
     """
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [IsAuthenticated]
-    device = "cpu"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        url = serializer.validated_data["video_url"]
-
-        if url.startswith("https://youtu.be/"):
-            url = url.split("?")[0].replace("youtu.be/", "www.youtube.com/watch?v=")
-
-        import tempfile, yt_dlp, os
-        from ..models import Question
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            ydl_opts = {
-                "js_runtimes": {
-                    "node": {}
-                },
-                "remote_components": [
-                    "ejs:github"
-                ],
-                "format": "bestaudio/best",
-                "outtmpl": os.path.join(tmpdir, "audio.%(ext)s"),
-                "quiet": True,
-                "noplaylist": True,
-                "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3"}],
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                audio_file = info["requested_downloads"][0]["filepath"]
-
-            model = whisper.load_model("turbo")
-            results = model.transcribe(audio_file)
-            transcript_text = " ".join([segment["text"] for segment in results["segments"]])
-
-            client = genai.Client(api_key=os.getenv("GENAI_API_KEY", default="unsecure-key"))
-
-            prompt = f"""
-                Based on the following transcript, generate a quiz in valid JSON format.
-                The quiz must follow this exact structure:
-                    {{
-                    "title": "Create a concise quiz title based on the topic of the transcript.",
-                    "description": "Summarize the transcript in no more than 150 characters. Do not include any quiz questions or answers.",
-                    "questions": [
-                        {{
-                        "question_title": "The question goes here.",
-                        "question_options": ["Option A", "Option B", "Option C", "Option D"],
-                        "answer": "The correct answer from the above options"
-                        }},
-                        ...
-                        (exactly 10 questions)
-                    ]
-                    }}
-                Requirements:
-                - Each question must have exactly 4 distinct answer options.
-                - Only one correct answer is allowed per question, and it must be present in 'question_options'.
-                - The output must be valid JSON and parsable as-is (e.g., using Python's json.loads).
-                - Do not include explanations, comments, or any text outside the JSON.
-                
-                TRANSCRIPT:
-                {transcript_text}
-                """
-            
-            response = client.models.generate_content(
-                model="gemini-2.5-flash", 
-                contents=prompt,
-            )
-            
-            raw = response.candidates[0].content.parts[0].text
-            json_str = re.search(r"\{.*\}", raw, re.S).group()
-            quiz_data = json.loads(json_str)
-    
-            quiz = serializer.save(
+        url = normalize_video_url(serializer.validated_data["video_url"])
+        time_range = QuizSerializer.time_range(serializer.validated_data)
+
+        if settings.QUIZ_ASYNC_CREATION:
+            job = QuizJob.objects.create(
                 creator=request.user,
-                title=quiz_data["title"],
-                description=quiz_data["description"],
                 video_url=url,
+                start_seconds=serializer.validated_data.get("start_seconds"),
+                end_seconds=serializer.validated_data.get("end_seconds"),
             )
+            enqueue_job(job)
+            return Response(QuizJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        # The pipeline pulls in numpy, tenacity and friends, so it is only imported when it runs.
+        from ..services.pipeline import run_pipeline
+
+        try:
+            quiz = run_pipeline(url, request.user, time_range=time_range)
+        except IngestRejected as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        output_serializer = QuizSerializer(quiz)
+
+        return Response(output_serializer.data, status=status.HTTP_201_CREATED)
+
+
+def batch_queryset(user):
+    jobs = QuizJob.objects.select_related('quiz').order_by('id')
+    return (
+        QuizBatch.objects.filter(creator=user)
+        .prefetch_related(Prefetch('jobs', queryset=jobs), questions_prefetch('jobs__quiz__questions'))
+    )
+
+
+class QuizBatchCreateView(generics.CreateAPIView):
+    """
+    API endpoint for turning a playlist or a list of video URLs into quizzes.
+
+    Creates one QuizJob per video (duplicates are dropped, at most QUIZ_BATCH_MAX_ITEMS)
+    and answers with status 202 and the batch; poll the batch for per-video status.
+    A playlist is read by a job as well, so its videos appear in the batch once the
+    `playlist` status is succeeded.
+    """
+    serializer_class = QuizBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        playlist_url = serializer.validated_data.get('playlist_url', '')
 
-            for q in quiz_data["questions"]:
-                Question.objects.create(
-                    quiz=quiz,
-                    question_title=q["question_title"],
-                    question_options=q["question_options"],
-                    answer=q["answer"],
-                )
+        if playlist_url:
+            batch = create_playlist_batch(request.user, playlist_url)
+        else:
+            urls = serializer.validated_data['video_urls']
+            batch = create_batch(request.user, [normalize_video_url(url) for url in urls])
+        batch = batch_queryset(request.user).get(pk=batch.pk)
+        return Response(QuizBatchSerializer(batch).data, status=status.HTTP_202_ACCEPTED)
 
-            output_serializer = QuizSerializer(quiz)
 
-            return Response(output_serializer.data, status=status.HTTP_201_CREATED)
+class QuizBatchDetailView(generics.RetrieveAPIView):
+    """
+    API endpoint for polling a batch: the status of each of its jobs and their quizzes.
+    """
+    serializer_class = QuizBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return batch_queryset(self.request.user)
+
+
+class QuizJobDetailView(generics.RetrieveAPIView):
+    """
+    API endpoint for polling a quiz generation job.
+
+    Returns the current stage, progress and, once finished, the generated quiz
+    of a job created by the authenticated user.
+    """
+    serializer_class = QuizJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Return jobs created by the authenticated user.
+        """
+
+        return (
+            QuizJob.objects.filter(creator=self.request.user)
+            .select_related('quiz')
+            .prefetch_related(questions_prefetch('quiz__questions'))
+        )
 
 
 class ListRetrieveUpdateDestroyViewSet(
@@ -124,20 +130,27 @@ class ListRetrieveUpdateDestroyViewSet(
     """
     pass
 
-class QuizViewSet(ListRetrieveUpdateDestroyViewSet):
+class QuizViewSet(ConditionalQuizCacheMixin, ListRetrieveUpdateDestroyViewSet):
     """
     API endpoint for view of Quizzes.
 
     Lists Quizzes where the user is authenticated user,
     and allows updating, creating, deleting a quiz where the requesting user is set as the creator who made the quiz.
+    List and detail responses carry an ETag and answer If-None-Match with 304 Not Modified.
     """
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = QuizCursorPagination
 
     def get_queryset(self):
         """
-        Return quizzes created by the authenticated user.
+        Return quizzes created by the authenticated user, newest first.
+        Questions are fetched in one extra query for the whole page instead of one per quiz.
         """
 
-        return Quiz.objects.filter(creator=self.request.user)
\ No newline at end of file
+        queryset = user_quizzes(self.request.user).only(*QUIZ_FIELDS).order_by('-created_at', '-id')
+        selected = QuizSerializer.selected_fields(self.request)
+        if selected is None or 'questions' in selected:
+            queryset = queryset.prefetch_related(questions_prefetch())
+        return queryset
\ No newline at end of file
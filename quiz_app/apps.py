@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class QuizAppConfig(AppConfig):
-    name = 'quiz_app'
\ No newline at end of file
+    name = 'quiz_app'
+
+    def ready(self):
+        # Dedicated workers load their model themselves, the API role never does.
+        if settings.WHISPER_PRELOAD and settings.QUIZZLY_ROLE == 'all':
+            from .services.model_registry import warm_up
+            warm_up()
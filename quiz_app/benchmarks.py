@@ -0,0 +1,150 @@
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import time
+import wave
+from array import array
+
+FIXTURE_SAMPLE_RATE = 16000
+
+CANNED_QUIZ = {
+    "title": "Benchmark Quiz",
+    "description": "Canned quiz returned by the fake LLM.",
+    "questions": [
+        {
+            "question_title": f"Benchmark question {number}?",
+            "question_options": ["Option A", "Option B", "Option C", "Option D"],
+            "answer": "Option A",
+        }
+        for number in range(1, 11)
+    ],
+}
+
+CANNED_SEGMENTS = [
+    {"start": float(index * 5), "end": float(index * 5 + 5), "text": f" Benchmark sentence number {index}."}
+    for index in range(12)
+]
+
+
+def write_fixture(path, seconds, seed=0):
+    """
+    Write a mono 16 kHz WAV file of `seconds` length with speech-like bursts:
+    short harmonic syllables with varying pitch, separated by gaps and longer pauses.
+    """
+    rng = random.Random(seed)
+    samples = array('h')
+    total = int(seconds * FIXTURE_SAMPLE_RATE)
+
+    while len(samples) < total:
+        if rng.random() < 0.1:
+            samples.extend([0] * int(rng.uniform(0.5, 1.5) * FIXTURE_SAMPLE_RATE))
+            continue
+        pitch = rng.uniform(100, 220)
+        length = int(rng.uniform(0.12, 0.3) * FIXTURE_SAMPLE_RATE)
+        for index in range(length):
+            t = index / FIXTURE_SAMPLE_RATE
+            envelope = math.sin(math.pi * index / length)
+            value = sum(math.sin(2 * math.pi * pitch * harmonic * t) / harmonic for harmonic in (1, 2, 3))
+            samples.append(int(6000 * envelope * value))
+        samples.extend([0] * int(rng.uniform(0.03, 0.12) * FIXTURE_SAMPLE_RATE))
+
+    del samples[total:]
+    with wave.open(path, 'wb') as fixture:
+        fixture.setnchannels(1)
+        fixture.setsampwidth(2)
+        fixture.setframerate(FIXTURE_SAMPLE_RATE)
+        fixture.writeframes(samples.tobytes())
+    return path
+
+
+def fixture_duration(path):
+    with wave.open(path, 'rb') as fixture:
+        return fixture.getnframes() / fixture.getframerate()
+
+
+def prepare_fixtures(directory, durations):
+    """
+    Generate one fixture per duration in `directory` and return their paths.
+    """
+    return [
+        write_fixture(os.path.join(directory, f'fixture_{int(seconds)}s.wav'), seconds, seed=index)
+        for index, seconds in enumerate(durations)
+    ]
+
+
+def stub_probe(fixture):
+    """
+    Replacement for `ingest.probe` that describes `fixture` instead of asking YouTube.
+    """
+    def probe(url):
+        return {"webpage_url": url, "duration": fixture_duration(fixture), "filesize": os.path.getsize(fixture)}
+
+    return probe
+
+
+def stub_download(fixture):
+    """
+    Replacement for `pipeline.download_audio` that copies `fixture` instead of calling yt-dlp.
+    """
+    def download_audio(info, tmpdir, time_range=None):
+        target = os.path.join(tmpdir, os.path.basename(fixture))
+        shutil.copyfile(fixture, target)
+        return target
+
+    return download_audio
+
+
+def fake_call_llm(prompt, config=None):
+    """
+    Replacement for `generation.call_llm` returning the canned quiz with plausible token counts.
+    """
+    text = json.dumps(CANNED_QUIZ)
+    return text, {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+
+
+async def fake_acall_llm(prompt, config=None):
+    return fake_call_llm(prompt)
+
+
+def fake_call_llm_stream(prompt, config=None, on_text=None):
+    """
+    Replacement for `generation.call_llm_stream` handing out the canned quiz in small pieces.
+    """
+    text, usage = fake_call_llm(prompt)
+    if on_text is not None:
+        for start in range(0, len(text), 64):
+            on_text(text[start:start + 64])
+    return text, usage
+
+
+async def fake_acall_llm_stream(prompt, config=None, on_text=None):
+    return fake_call_llm_stream(prompt, on_text=on_text)
+
+
+def summarize(samples):
+    """
+    Summarize timings in seconds as milliseconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "min_ms": round(ordered[0] * 1000, 2),
+    }
+
+
+def measure(func, repeat):
+    """
+    Call `func` `repeat` times and return the individual durations in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
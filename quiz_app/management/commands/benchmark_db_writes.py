@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.database import sqlite_pragmas
+from quiz_app.models import Question, Quiz
+
+BENCHMARK_USERNAME = 'db-write-benchmark'
+
+
+def run_writers(threads, writes, write):
+    """
+    Run `write(thread_index, write_index)` `writes` times in each of `threads` threads.
+    Returns the number of successful and failed writes and the elapsed time.
+    """
+    results = {'ok': 0, 'failed': 0, 'errors': {}}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(thread_index):
+        barrier.wait()
+        for write_index in range(writes):
+            try:
+                write(thread_index, write_index)
+                outcome, error = 'ok', None
+            except Exception as exc:
+                outcome, error = 'failed', str(exc).split('\n')[0]
+            with lock:
+                results[outcome] += 1
+                if error:
+                    results['errors'][error] = results['errors'].get(error, 0) + 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results['seconds'] = round(time.perf_counter() - started, 3)
+    results['writes_per_second'] = round(results['ok'] / results['seconds'], 1) if results['seconds'] else None
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent quiz write throughput on a throwaway copy of the configured database. '
+        'With --compare-sqlite, also compare default and WAL tuned SQLite on temporary files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent writers.')
+        parser.add_argument('--writes', type=int, default=50, help='Quizzes written per writer.')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per quiz.')
+        parser.add_argument('--compare-sqlite', action='store_true', help='Also benchmark raw SQLite journal modes.')
+
+    def handle(self, *args, **options):
+        # Never touch the configured database: write to a test database with the same engine and options.
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as tmpdir:
+            if connection.vendor == 'sqlite':
+                # The default SQLite test database lives in memory, which would not measure the file's locking.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'benchmark.sqlite3')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                configured = self.benchmark_orm(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            'threads': options['threads'],
+            'writes_per_thread': options['writes'],
+            'configured': configured,
+        }
+        if options['compare_sqlite']:
+            report['sqlite_default'] = self.benchmark_sqlite(options, pragmas=['PRAGMA busy_timeout=5000'])
+            report['sqlite_wal'] = self.benchmark_sqlite(options, pragmas=sqlite_pragmas())
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def benchmark_orm(self, options):
+        """
+        Write quizzes with their questions through the ORM, the same way quiz creation does.
+        """
+        user = get_user_model().objects.create_user(username=BENCHMARK_USERNAME)
+
+        def write(thread_index, write_index):
+            try:
+                with transaction.atomic():
+                    quiz = Quiz.objects.create(creator=user, title=f'Benchmark {thread_index}-{write_index}')
+                    Question.objects.bulk_create([
+                        Question(quiz=quiz, question_title=f'Question {number}', question_options=['A', 'B', 'C', 'D'], answer='A')
+                        for number in range(options['questions'])
+                    ])
+            finally:
+                if write_index == options['writes'] - 1:
+                    connection.close()
+
+        results = run_writers(options['threads'], options['writes'], write)
+        results['vendor'] = connections['default'].vendor
+        results['options'] = {
+            key: value for key, value in connections['default'].settings_dict.get('OPTIONS', {}).items()
+            if key != 'password'
+        }
+        return results
+
+    def benchmark_sqlite(self, options, pragmas):
+        """
+        Write the same rows with the sqlite3 module, one connection per thread, using `pragmas`.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'benchmark.sqlite3')
+            setup = sqlite3.connect(path)
+            setup.executescript(
+                'CREATE TABLE quiz (id INTEGER PRIMARY KEY, title TEXT);'
+                'CREATE TABLE question (id INTEGER PRIMARY KEY, quiz_id INTEGER, title TEXT, options TEXT, answer TEXT);'
+            )
+            setup.close()
+
+            local = threading.local()
+
+            def write(thread_index, write_index):
+                if not hasattr(local, 'conn'):
+                    local.conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+                    for pragma in pragmas:
+                        local.conn.execute(pragma)
+                conn = local.conn
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    quiz_id = conn.execute('INSERT INTO quiz (title) VALUES (?)', (f'Benchmark {thread_index}-{write_index}',)).lastrowid
+                    conn.executemany(
+                        'INSERT INTO question (quiz_id, title, options, answer) VALUES (?, ?, ?, ?)',
+                        [(quiz_id, f'Question {number}', '["A", "B", "C", "D"]', 'A') for number in range(options['questions'])],
+                    )
+                    conn.execute('COMMIT')
+                except sqlite3.Error:
+                    conn.execute('ROLLBACK')
+                    raise
+                finally:
+                    if write_index == options['writes'] - 1:
+                        conn.close()
+
+            results = run_writers(options['threads'], options['writes'], write)
+            results['pragmas'] = pragmas
+            return results
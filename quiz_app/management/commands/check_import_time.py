@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that only the transcription and generation backends need. Serving the API must not load them.
+HEAVY_MODULES = (
+    'torch',
+    'whisper',
+    'faster_whisper',
+    'ctranslate2',
+    'numpy',
+    'av',
+    'yt_dlp',
+    'google.genai',
+    'tenacity',
+    'tiktoken',
+)
+
+BOOT_SCRIPT = 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into (module, self_us, cumulative_us, depth) tuples.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot Django and load the URLconf in a fresh interpreter with `-X importtime`. '
+        'Fails if the total import time exceeds the budget or a heavy ML/SDK module is imported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=1500, help='Maximum total import time in milliseconds.')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest top-level imports to list.')
+        parser.add_argument('--allow', nargs='*', default=[], help='Heavy modules that may be imported anyway.')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=env,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Booting the URLconf failed:\n{result.stderr[-2000:]}')
+
+        imports = parse_importtime(result.stderr)
+        top_level = [entry for entry in imports if entry[3] == 0]
+        total_ms = sum(entry[2] for entry in top_level) / 1000
+
+        self.stdout.write(f'Total import time: {total_ms:.0f} ms (budget {options["budget_ms"]:.0f} ms)')
+        for name, _self_us, cumulative_us, _depth in sorted(top_level, key=lambda entry: -entry[2])[:options['top']]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} ms  {name}')
+
+        loaded = {entry[0] for entry in imports}
+        heavy = sorted(
+            module for module in HEAVY_MODULES
+            if module in loaded and module not in options['allow']
+        )
+
+        problems = []
+        if heavy:
+            problems.append(f'heavy modules imported at boot: {", ".join(heavy)}')
+        if total_ms > options['budget_ms']:
+            problems.append(f'import time {total_ms:.0f} ms exceeds the budget of {options["budget_ms"]:.0f} ms')
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('Import time is within budget.'))
@@ -0,0 +1,215 @@
+import json
+import platform
+import subprocess
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from quiz_app import benchmarks
+from quiz_app.services import generation, ingest, pipeline
+from quiz_app.services.transcription import create_backend
+from quiz_app.testing import create_quizzes
+
+BENCHMARK_USERNAME = 'benchmark-suite'
+BENCHMARK_PASSWORD = 'benchmark-password'
+SUITES = ('create_quiz', 'transcription', 'quiz_list', 'auth')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the offline benchmark suite and print or write the results as JSON. '
+        'yt-dlp and Gemini are replaced by stubs and audio comes from generated fixtures, '
+        'so runs are comparable across commits. Runs against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', action='append', choices=SUITES, help='Suite to run, repeatable (default: all).')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions per measurement.')
+        parser.add_argument('--fixture-seconds', type=float, nargs='+', default=[10, 30], help='Durations of the generated audio fixtures.')
+        parser.add_argument('--backends', nargs='+', default=None, help='Transcription backends to compare (default: TRANSCRIPTION_BACKEND).')
+        parser.add_argument('--models', nargs='+', default=None, help='Whisper models to compare (default: WHISPER_MODEL).')
+        parser.add_argument('--list-sizes', type=int, nargs='+', default=[10, 100, 1000], help='Number of quizzes for the list benchmark.')
+        parser.add_argument('--stub-transcription', action='store_true', help='Skip Whisper in the createQuiz benchmark.')
+
+    def handle(self, *args, **options):
+        suites = options['suite'] or SUITES
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'transcription_backend': settings.TRANSCRIPTION_BACKEND,
+                'whisper_model': settings.WHISPER_MODEL,
+                'repeat': options['repeat'],
+            },
+        }
+
+        # Never touch the configured database: the suites create users and thousands of quizzes.
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = get_user_model().objects.create_user(username=BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                fixtures = benchmarks.prepare_fixtures(tmpdir, options['fixture_seconds'])
+                for suite in suites:
+                    self.stderr.write(f'Running {suite} benchmark...')
+                    results[suite] = getattr(self, f'benchmark_{suite}')(user, fixtures, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def authenticated_client(self, user):
+        client = Client()
+        client.cookies['access_token'] = str(RefreshToken.for_user(user).access_token)
+        return client
+
+    def benchmark_create_quiz(self, user, fixtures, options):
+        """
+        End-to-end latency of a synchronous createQuiz/ request with stubbed download and LLM.
+        """
+        client = self.authenticated_client(user)
+        results = {'stub_transcription': options['stub_transcription'], 'fixtures': {}}
+        counter = iter(range(10**6))
+
+        def create():
+            response = client.post(
+                reverse('quiz-create'),
+                {'url': f'https://www.youtube.com/watch?v=bnch{next(counter):07d}'},
+                content_type='application/json',
+            )
+            if response.status_code != 201:
+                raise RuntimeError(f'createQuiz/ returned {response.status_code}: {response.content[:200]}')
+
+        overrides = override_settings(
+            QUIZ_ASYNC_CREATION=False,
+            SINGLE_FLIGHT_ENABLED=False,
+            TRANSCRIPT_CACHE_ENABLED=False,
+            AUDIO_INGEST_MODE='download',
+        )
+        for fixture in fixtures:
+            with ExitStack() as stack:
+                stack.enter_context(overrides)
+                stack.enter_context(mock.patch.object(ingest, 'probe', benchmarks.stub_probe(fixture)))
+                stack.enter_context(mock.patch.object(pipeline, 'download_audio', benchmarks.stub_download(fixture)))
+                stack.enter_context(mock.patch.object(generation, 'call_llm', benchmarks.fake_call_llm))
+                stack.enter_context(mock.patch.object(generation, 'acall_llm', benchmarks.fake_acall_llm))
+                stack.enter_context(mock.patch.object(generation, 'call_llm_stream', benchmarks.fake_call_llm_stream))
+                stack.enter_context(mock.patch.object(generation, 'acall_llm_stream', benchmarks.fake_acall_llm_stream))
+                if options['stub_transcription']:
+                    stack.enter_context(mock.patch.object(pipeline, 'transcribe_audio', lambda audio_file, on_progress=None: benchmarks.CANNED_SEGMENTS))
+                create()  # Warm up model loading and connections.
+                samples = benchmarks.measure(create, options['repeat'])
+            results['fixtures'][f'{benchmarks.fixture_duration(fixture):g}s'] = benchmarks.summarize(samples)
+        return results
+
+    def benchmark_transcription(self, user, fixtures, options):
+        """
+        Model load time and real-time factor (transcription time / audio duration) per backend and model.
+        """
+        results = []
+        for backend_name in options['backends'] or [settings.TRANSCRIPTION_BACKEND]:
+            for model in options['models'] or [settings.WHISPER_MODEL]:
+                entry = {'backend': backend_name, 'model': model}
+                results.append(entry)
+                try:
+                    with override_settings(WHISPER_MODEL=model):
+                        backend = create_backend(backend_name)
+                    entry['load_seconds'] = round(benchmarks.measure(backend.get_model, 1)[0], 3)
+                except Exception as exc:
+                    entry['error'] = f'{type(exc).__name__}: {exc}'
+                    continue
+
+                entry['fixtures'] = {}
+                for fixture in fixtures:
+                    duration = benchmarks.fixture_duration(fixture)
+                    samples = benchmarks.measure(lambda: backend.transcribe(fixture), options['repeat'])
+                    summary = benchmarks.summarize(samples)
+                    summary['real_time_factor'] = round(summary['median_ms'] / 1000 / duration, 4)
+                    entry['fixtures'][f'{duration:g}s'] = summary
+        return results
+
+    def benchmark_quiz_list(self, user, fixtures, options):
+        """
+        Latency of GET /api/quizzes/ as the number of stored quizzes grows, with and without the response cache.
+        """
+        client = self.authenticated_client(user)
+        cache = caches[settings.QUIZ_RESPONSE_CACHE]
+        results = {}
+        existing = 0
+        for size in sorted(options['list_sizes']):
+            create_quizzes(user, size - existing)
+            existing = size
+            entry = results[str(size)] = {}
+            for label, path in (('full', '/api/quizzes/'), ('fields', '/api/quizzes/?fields=id,title')):
+                def get():
+                    response = client.get(path)
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{path} returned {response.status_code}')
+
+                def uncached():
+                    cache.clear()
+                    get()
+
+                entry[f'{label}_uncached'] = benchmarks.summarize(benchmarks.measure(uncached, options['repeat']))
+                entry[f'{label}_cached'] = benchmarks.summarize(benchmarks.measure(get, options['repeat']))
+        return results
+
+    def benchmark_auth(self, user, fixtures, options):
+        """
+        Throughput of login (password check and token issue) and access token refresh.
+        """
+        client = Client()
+        credentials = {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD}
+
+        def login():
+            response = client.post(reverse('token_obtain_pair'), credentials, content_type='application/json')
+            if response.status_code != 200:
+                raise RuntimeError(f'login/ returned {response.status_code}')
+
+        def refresh():
+            # The refresh view reads the cookie and validates the request body as well.
+            response = client.post(
+                reverse('token_refresh'),
+                {'refresh': client.cookies['refresh_token'].value},
+                content_type='application/json',
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f'token/refresh/ returned {response.status_code}')
+
+        results = {}
+        for name, func in (('login', login), ('refresh', refresh)):
+            samples = benchmarks.measure(func, options['repeat'] * 10)
+            summary = benchmarks.summarize(samples)
+            summary['requests_per_second'] = round(len(samples) / sum(samples), 1)
+            results[name] = summary
+        return results
@@ -0,0 +1,65 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz_app.services import metrics
+from quiz_app.services.processes import spawn_context, threads_per_process
+from quiz_app.services.worker import worker_main
+
+RESTART_DELAY_SECONDS = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued quiz jobs in dedicated worker processes. Each process loads the '
+        'transcription model once and is pinned to its share of the CPU cores. '
+        'Start it with QUIZZLY_ROLE=worker next to API processes started with QUIZZLY_ROLE=api.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.QUIZ_JOB_WORKERS, help='Number of worker processes.')
+        parser.add_argument('--threads', type=int, default=None, help='CPU threads per process (default: cores / concurrency).')
+
+    def handle(self, *args, **options):
+        if settings.QUIZZLY_ROLE == 'api':
+            raise CommandError('run_quiz_worker cannot run with the API role, set QUIZZLY_ROLE=worker.')
+        if settings.QUIZ_JOB_DISPATCH != 'queue':
+            self.stderr.write(self.style.WARNING(
+                'QUIZ_JOB_DISPATCH is not "queue": jobs created by this deployment are also run by local process pools.'
+            ))
+
+        concurrency = options['concurrency']
+        threads = options['threads'] or threads_per_process(concurrency)
+        context = spawn_context()
+        stop = context.Event()
+
+        def start(index):
+            process = context.Process(target=worker_main, args=(index, threads, stop, concurrency), name=f'quiz-worker-{index}')
+            process.start()
+            return process
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stopping workers after their current job...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        metrics.registry.prune()
+        workers = [start(index) for index in range(concurrency)]
+        self.stdout.write(f'Started {concurrency} quiz workers with {threads} threads each.')
+
+        while not stop.is_set():
+            for index, process in enumerate(workers):
+                if not process.is_alive():
+                    self.stderr.write(f'Quiz worker {index} exited with code {process.exitcode}, restarting.')
+                    metrics.discard(process.pid)
+                    time.sleep(RESTART_DELAY_SECONDS)
+                    workers[index] = start(index)
+            stop.wait(1)
+
+        for process in workers:
+            process.join()
+        self.stdout.write('All quiz workers stopped.')
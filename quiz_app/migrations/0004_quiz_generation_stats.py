@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0003_transcript'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='generation_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
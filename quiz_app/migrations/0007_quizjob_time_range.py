@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0006_pipelinelease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='start_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizjob',
+            name='end_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
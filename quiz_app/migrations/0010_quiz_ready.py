@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0009_quizjob_owner_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='ready',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0010_quiz_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='kind',
+            field=models.CharField(choices=[('video', 'Video'), ('playlist', 'Playlist')], default='video', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0011_quizjob_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transcript',
+            name='video_id',
+            field=models.CharField(max_length=64),
+        ),
+    ]
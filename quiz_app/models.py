@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 class Quiz(models.Model):
@@ -8,6 +9,14 @@ class Quiz(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     video_url = models.URLField(null=False, blank=False, default='')
     creator = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='quizzes')
+    generation_stats = models.JSONField(default=dict, blank=True)
+    # False while the questions of a streamed quiz are still being generated.
+    ready = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['creator', '-created_at'], name='quiz_creator_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -22,4 +31,114 @@ class Question(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return self.question_title
\ No newline at end of file
+        return self.question_title
+
+class QuizJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    class Stage(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        DOWNLOADING = 'downloading', 'Downloading'
+        TRANSCRIBING = 'transcribing', 'Transcribing'
+        GENERATING = 'generating', 'Generating'
+        PERSISTING = 'persisting', 'Persisting'
+        DONE = 'done', 'Done'
+
+    class Kind(models.TextChoices):
+        VIDEO = 'video', 'Video'
+        # Reads a playlist and adds one video job per entry to the batch.
+        PLAYLIST = 'playlist', 'Playlist'
+
+    creator = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='quiz_jobs')
+    kind = models.CharField(max_length=16, choices=Kind.choices, default=Kind.VIDEO)
+    video_url = models.URLField(null=False, blank=False, default='')
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    stage = models.CharField(max_length=16, choices=Stage.choices, default=Stage.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    start_seconds = models.FloatField(null=True, blank=True)
+    end_seconds = models.FloatField(null=True, blank=True)
+    batch = models.ForeignKey('QuizBatch', on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    owner = models.CharField(max_length=255, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.video_url} ({self.status})'
+
+    @property
+    def time_range(self):
+        if self.start_seconds is None and self.end_seconds is None:
+            return None
+        return (self.start_seconds or 0, self.end_seconds)
+
+
+class QuizBatch(models.Model):
+    creator = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='quiz_batches')
+    playlist_url = models.URLField(blank=True, default='')
+    title = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title or f'Batch {self.pk}'
+
+    @property
+    def video_jobs(self):
+        return [job for job in self.jobs.all() if job.kind == QuizJob.Kind.VIDEO]
+
+    @property
+    def playlist_job(self):
+        return next((job for job in self.jobs.all() if job.kind == QuizJob.Kind.PLAYLIST), None)
+
+
+class Transcript(models.Model):
+    video_id = models.CharField(max_length=64, null=False, blank=False)
+    model_name = models.CharField(max_length=128, null=False, blank=False)
+    model_version = models.CharField(max_length=64, blank=True, default='')
+    language = models.CharField(max_length=16, blank=True, default='')
+    segments = models.JSONField(default=list)
+    size_bytes = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video_id', 'model_name'], name='unique_transcript_per_model'),
+        ]
+
+    @property
+    def text(self):
+        return " ".join(segment["text"] for segment in self.segments)
+
+    def __str__(self):
+        return f'{self.video_id} ({self.model_name})'
+
+
+class PipelineLease(models.Model):
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    key = models.CharField(max_length=64, unique=True)
+    run_id = models.CharField(max_length=32)
+    owner = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.RUNNING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.key} ({self.status})'
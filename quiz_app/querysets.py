@@ -0,0 +1,21 @@
+from django.db.models import Prefetch
+
+from .models import Question, Quiz
+
+# Columns QuizSerializer reads; everything else (e.g. generation_stats) stays in the database.
+QUIZ_FIELDS = ('id', 'title', 'description', 'created_at', 'updated_at', 'video_url', 'creator_id')
+QUESTION_FIELDS = ('id', 'quiz_id', 'question_title', 'question_options', 'answer')
+
+
+def user_quizzes(user):
+    """
+    Finished quizzes of `user`; quizzes whose questions are still being generated are left out.
+    """
+    return Quiz.objects.filter(creator=user, ready=True)
+
+
+def questions_prefetch(lookup='questions'):
+    """
+    Prefetch the questions of many quizzes in one query, loading only the serialized columns.
+    """
+    return Prefetch(lookup, queryset=Question.objects.only(*QUESTION_FIELDS).order_by('id'))
@@ -0,0 +1,155 @@
+import queue
+import threading
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.1
+
+
+def decode_stream(source, chunk_seconds=5, headers=None, start=None, end=None):
+    """
+    Decode `source` (a file path or stream URL) to 16 kHz mono float32 and yield it in chunks.
+
+    Decoding happens while the input is being read, so nothing is written to disk
+    and the first chunk is available after a few seconds of network transfer.
+    With `start` / `end` (seconds) only that part is decoded; the input is seeked
+    to `start`, so the preceding audio is not fetched either.
+    """
+    import av
+
+    options = {}
+    if headers:
+        options["headers"] = "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+
+    chunk_size = int(chunk_seconds * SAMPLE_RATE)
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+    pending = []
+    pending_size = 0
+
+    with av.open(source, options=options) as container:
+        stream = container.streams.audio[0]
+        if start:
+            container.seek(int(start * av.time_base))
+        for frame in container.decode(stream):
+            if frame.time is not None:
+                if end is not None and frame.time >= end:
+                    break
+                if start and frame.time + frame.samples / frame.sample_rate <= start:
+                    continue
+            for resampled in resampler.resample(frame):
+                samples = resampled.to_ndarray().reshape(-1)
+                pending.append(samples)
+                pending_size += samples.size
+                while pending_size >= chunk_size:
+                    buffer = np.concatenate(pending)
+                    yield buffer[:chunk_size]
+                    pending = [buffer[chunk_size:]]
+                    pending_size = pending[0].size
+
+        for resampled in resampler.resample(None):
+            pending.append(resampled.to_ndarray().reshape(-1))
+
+    if pending:
+        buffer = np.concatenate(pending)
+        if buffer.size:
+            yield buffer
+
+
+def load_audio(source, headers=None):
+    """
+    Decode a whole file or stream into a single 16 kHz mono float32 array.
+    """
+    chunks = list(decode_stream(source, chunk_seconds=60, headers=headers))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def prefetch(iterable, maxsize=8):
+    """
+    Consume `iterable` in a background thread and yield its items from a bounded queue.
+
+    Lets decoding of the next chunks continue while the caller is busy with the current one.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                items.put(item)
+        except Exception as exc:
+            items.put(exc)
+        finally:
+            items.put(done)
+
+    thread = threading.Thread(target=produce, name="audio-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue.
+        while thread.is_alive():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                thread.join(0.05)
+
+
+def frame_energy(samples, frame_seconds=FRAME_SECONDS):
+    """
+    Return the RMS energy of consecutive frames of `samples`.
+    """
+    frame_size = int(frame_seconds * SAMPLE_RATE)
+    frame_count = samples.size // frame_size
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def quietest_index(samples):
+    """
+    Return the sample index in the middle of the quietest frame of `samples`.
+    """
+    energy = frame_energy(samples)
+    if energy.size == 0:
+        return samples.size // 2
+    frame_size = int(FRAME_SECONDS * SAMPLE_RATE)
+    return int(np.argmin(energy)) * frame_size + frame_size // 2
+
+
+def quietest_point(samples, search_seconds=2.0):
+    """
+    Return the sample index of the quietest frame within the last `search_seconds` of `samples`.
+
+    Used to cut audio between words rather than in the middle of one.
+    """
+    search_size = min(samples.size, int(search_seconds * SAMPLE_RATE))
+    start = samples.size - search_size
+    if search_size < int(FRAME_SECONDS * SAMPLE_RATE):
+        return samples.size
+    return start + quietest_index(samples[start:])
+
+
+def audio_duration(source):
+    """
+    Return the duration of an audio file in seconds, read from the container metadata.
+    """
+    import av
+
+    with av.open(source) as container:
+        if container.duration is None:
+            return None
+        return container.duration / av.time_base
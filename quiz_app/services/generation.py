@@ -0,0 +1,456 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .llm import get_gateway
+from .quiz_output import QuizOutput, QuizStreamParser, decode_json_object
+
+logger = logging.getLogger(__name__)
+
+QUIZ_PROMPT = """
+    Based on the following {source}, generate a quiz in valid JSON format.
+    The quiz must follow this exact structure:
+        {{
+        "title": "Create a concise quiz title based on the topic of the transcript.",
+        "description": "Summarize the transcript in no more than 150 characters. Do not include any quiz questions or answers.",
+        "questions": [
+            {{
+            "question_title": "The question goes here.",
+            "question_options": ["Option A", "Option B", "Option C", "Option D"],
+            "answer": "The correct answer from the above options"
+            }},
+            ...
+            (exactly 10 questions)
+        ]
+        }}
+    Requirements:
+    - Each question must have exactly 4 distinct answer options.
+    - Only one correct answer is allowed per question, and it must be present in 'question_options'.
+    - The output must be valid JSON and parsable as-is (e.g., using Python's json.loads).
+    - Do not include explanations, comments, or any text outside the JSON.
+
+    {label}:
+    {content}
+    """
+
+MAP_PROMPT = """
+    The following text is part {index} of {total} of a video transcript.
+    Extract the key facts, definitions, names, numbers and explanations it contains
+    as a concise bullet list. Keep everything that a quiz question could be based on
+    and leave out filler, greetings and repetitions. Answer with the bullet list only.
+
+    TRANSCRIPT PART:
+    {content}
+    """
+
+REPAIR_PROMPT = """
+    The following quiz JSON is invalid: {error}
+    Return the corrected quiz as valid JSON with the same structure, keeping as much of
+    the content as possible. Each question needs exactly 4 distinct options and the
+    answer must be one of them. Answer with the JSON only.
+
+    INVALID QUIZ:
+    {output}
+    """
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                # The BPE file could not be loaded (e.g. offline); fall back to estimates.
+                logger.warning("tiktoken encoding unavailable, estimating token counts")
+                _encoding = False
+        return _encoding
+
+
+def count_tokens(text):
+    """
+    Return the number of tokens in `text`.
+
+    Gemini uses its own tokenizer, so this is an estimate; it is close enough to decide
+    between one prompt and map-reduce.
+    """
+    encoding = _get_encoding()
+    if not encoding:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text, max_tokens):
+    """
+    Split `text` into consecutive pieces of at most `max_tokens` tokens each.
+    """
+    encoding = _get_encoding()
+    if not encoding:
+        size = max_tokens * 4
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _usage(usage):
+    return {
+        "input_tokens": getattr(usage, "prompt_token_count", None) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", None) or 0,
+    }
+
+
+def _response_result(response):
+    return response.candidates[0].content.parts[0].text, _usage(response.usage_metadata)
+
+
+def call_llm(prompt, config=None):
+    """
+    Send `prompt` to Gemini through the LLM gateway and return the response text with its token usage.
+    """
+    return _response_result(get_gateway().generate(prompt, config=config))
+
+
+async def acall_llm(prompt, config=None):
+    """
+    Async variant of `call_llm`.
+    """
+    return _response_result(await get_gateway().agenerate(prompt, config=config))
+
+
+def call_llm_stream(prompt, config=None, on_text=None):
+    """
+    Like `call_llm`, but streams the response and passes every piece of text to `on_text` as it arrives.
+    """
+    parts = []
+    usage = None
+    for chunk in get_gateway().generate_stream(prompt, config=config):
+        text = chunk.text or ""
+        if text:
+            parts.append(text)
+            if on_text is not None:
+                on_text(text)
+        usage = chunk.usage_metadata or usage
+    return "".join(parts), _usage(usage)
+
+
+async def acall_llm_stream(prompt, config=None, on_text=None):
+    """
+    Async variant of `call_llm_stream`.
+    """
+    parts = []
+    usage = None
+    async for chunk in get_gateway().agenerate_stream(prompt, config=config):
+        text = chunk.text or ""
+        if text:
+            parts.append(text)
+            if on_text is not None:
+                on_text(text)
+        usage = chunk.usage_metadata or usage
+    return "".join(parts), _usage(usage)
+
+
+def parse_quiz_json(raw):
+    """
+    Decode and validate the quiz in an LLM response. Raises InvalidQuizData.
+    """
+    try:
+        quiz_data = QuizOutput.model_validate(decode_json_object(raw)).model_dump()
+    except ValueError as exc:
+        raise InvalidQuizData(f"The response is not a valid quiz: {exc}") from exc
+    validate_quiz_data(quiz_data)
+    return quiz_data
+
+
+class InvalidQuizData(ValueError):
+    """
+    Raised when a generated quiz does not match the expected structure.
+    """
+
+
+def validate_quiz_data(quiz_data):
+    """
+    Check a generated quiz before anything is written to the database.
+
+    Every question needs a title, exactly 4 distinct options and an answer that is one of them.
+    """
+    if not isinstance(quiz_data, dict):
+        raise InvalidQuizData("Quiz must be a JSON object.")
+
+    for field in ("title", "description"):
+        if not isinstance(quiz_data.get(field), str) or not quiz_data[field].strip():
+            raise InvalidQuizData(f"Quiz {field} is missing.")
+    if len(quiz_data["title"]) > 255:
+        raise InvalidQuizData("Quiz title is longer than 255 characters.")
+
+    questions = quiz_data.get("questions")
+    if not isinstance(questions, list) or not questions:
+        raise InvalidQuizData("Quiz has no questions.")
+
+    for number, question in enumerate(questions, start=1):
+        validate_question(question, number)
+
+
+def validate_question(question, number):
+    """
+    Check a single generated question; `number` is used in the error message.
+    """
+    if not isinstance(question, dict):
+        raise InvalidQuizData(f"Question {number} must be a JSON object.")
+    title = question.get("question_title")
+    options = question.get("question_options")
+    answer = question.get("answer")
+    if not isinstance(title, str) or not title.strip() or len(title) > 255:
+        raise InvalidQuizData(f"Question {number} has no valid title.")
+    if not isinstance(options, list) or len(options) != 4 or not all(isinstance(option, str) for option in options):
+        raise InvalidQuizData(f"Question {number} must have exactly 4 options.")
+    if len(set(options)) != 4:
+        raise InvalidQuizData(f"Question {number} has duplicate options.")
+    if not isinstance(answer, str) or answer not in options or len(answer) > 255:
+        raise InvalidQuizData(f"Question {number} has an answer that is not one of its options.")
+
+
+class GenerationStats:
+    """
+    Collects token counts and per-stage timings of a single quiz generation.
+    """
+
+    def __init__(self, strategy, transcript_tokens):
+        self.data = {
+            "strategy": strategy,
+            "transcript_tokens": transcript_tokens,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "llm_calls": 0,
+            "timings": {},
+        }
+        self._lock = threading.Lock()
+
+    def add_usage(self, usage):
+        with self._lock:
+            self.data["input_tokens"] += usage["input_tokens"]
+            self.data["output_tokens"] += usage["output_tokens"]
+            self.data["llm_calls"] += 1
+
+    @contextmanager
+    def timed(self, stage):
+        """
+        Add the time spent in the block to `stage`, so repeated stages such as repairs add up.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = self.data["timings"]
+            timings[stage] = round(timings.get(stage, 0) + time.perf_counter() - started, 3)
+
+
+def quiz_prompt(transcript_text=None, notes=None):
+    if notes is not None:
+        return QUIZ_PROMPT.format(source="key facts extracted from a video transcript", label="KEY FACTS", content=notes)
+    return QUIZ_PROMPT.format(source="transcript", label="TRANSCRIPT", content=transcript_text)
+
+
+def start_generation(transcript_text):
+    """
+    Measure the transcript and decide between a single prompt and map-reduce.
+    """
+    transcript_tokens = count_tokens(transcript_text)
+    map_reduce = transcript_tokens > settings.GENERATION_MAP_REDUCE_THRESHOLD_TOKENS
+    chunks = split_tokens(transcript_text, settings.GENERATION_CHUNK_TOKENS) if map_reduce else []
+    stats = GenerationStats("map_reduce" if map_reduce else "direct", transcript_tokens)
+    if map_reduce:
+        stats.data["chunks"] = len(chunks)
+    return chunks, stats
+
+
+def map_prompts(chunks):
+    return [MAP_PROMPT.format(index=index, total=len(chunks), content=chunk) for index, chunk in enumerate(chunks, start=1)]
+
+
+def quiz_config():
+    """
+    Ask Gemini for JSON matching the quiz schema, unless structured output is disabled.
+    """
+    if not settings.GENERATION_STRUCTURED_OUTPUT:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": QuizOutput}
+
+
+def question_emitter(on_question):
+    """
+    Return an `on_text` callback that parses the streamed response and passes every
+    complete and valid question to `on_question` as soon as it has arrived.
+    """
+    parser = QuizStreamParser()
+    emitted = []
+
+    def on_text(piece):
+        for question in parser.feed(piece):
+            try:
+                validate_question(question, len(emitted) + 1)
+            except InvalidQuizData:
+                continue
+            emitted.append(question)
+            on_question(question)
+
+    return on_text
+
+
+def use_stream(on_question):
+    return on_question is not None and settings.GENERATION_STREAM
+
+
+def retry_prompt(prompt, raw, error, attempt):
+    """
+    The first retry asks for a correction of the invalid output, later ones regenerate the quiz.
+    """
+    if attempt == 0:
+        return REPAIR_PROMPT.format(error=error, output=raw)
+    return prompt
+
+
+def request_quiz(prompt, stats, on_question=None):
+    if use_stream(on_question):
+        raw, usage = call_llm_stream(prompt, quiz_config(), on_text=question_emitter(on_question))
+    else:
+        raw, usage = call_llm(prompt, quiz_config())
+    stats.add_usage(usage)
+    return raw
+
+
+async def arequest_quiz(prompt, stats, on_question=None):
+    if use_stream(on_question):
+        raw, usage = await acall_llm_stream(prompt, quiz_config(), on_text=question_emitter(on_question))
+    else:
+        raw, usage = await acall_llm(prompt, quiz_config())
+    stats.add_usage(usage)
+    return raw
+
+
+def log_invalid(error, stats, attempt):
+    stats.data["repairs"] = attempt + 1
+    logger.warning("Invalid quiz from the LLM (retry %s of %s): %s", attempt + 1, settings.GENERATION_REPAIR_ATTEMPTS, error)
+
+
+def complete_quiz(prompt, stats, on_question=None):
+    """
+    Request the quiz for `prompt` and parse it, retrying invalid responses up to
+    GENERATION_REPAIR_ATTEMPTS times. Raises InvalidQuizData when all of them fail.
+
+    Only the first response is streamed to `on_question`; when it has to be repaired,
+    the returned quiz replaces the questions that were emitted.
+    """
+    with stats.timed("generate"):
+        raw = request_quiz(prompt, stats, on_question)
+
+    for attempt in range(settings.GENERATION_REPAIR_ATTEMPTS + 1):
+        try:
+            with stats.timed("parse"):
+                return parse_quiz_json(raw)
+        except InvalidQuizData as exc:
+            if attempt == settings.GENERATION_REPAIR_ATTEMPTS:
+                raise
+            log_invalid(exc, stats, attempt)
+            with stats.timed("repair"):
+                raw = request_quiz(retry_prompt(prompt, raw, exc, attempt), stats)
+
+
+async def acomplete_quiz(prompt, stats, on_question=None):
+    """
+    Async variant of `complete_quiz`.
+    """
+    with stats.timed("generate"):
+        raw = await arequest_quiz(prompt, stats, on_question)
+
+    for attempt in range(settings.GENERATION_REPAIR_ATTEMPTS + 1):
+        try:
+            with stats.timed("parse"):
+                return parse_quiz_json(raw)
+        except InvalidQuizData as exc:
+            if attempt == settings.GENERATION_REPAIR_ATTEMPTS:
+                raise
+            log_invalid(exc, stats, attempt)
+            with stats.timed("repair"):
+                raw = await arequest_quiz(retry_prompt(prompt, raw, exc, attempt), stats)
+
+
+def finish_generation(quiz_data, stats):
+    logger.info("Generated quiz: %s", json.dumps(stats.data))
+    return quiz_data, stats.data
+
+
+def condense_transcript(chunks, stats):
+    """
+    Map step: extract the key facts of every transcript chunk concurrently and join them.
+    """
+    def extract(prompt):
+        text, usage = call_llm(prompt)
+        stats.add_usage(usage)
+        return text.strip()
+
+    with ThreadPoolExecutor(max_workers=settings.GENERATION_MAP_CONCURRENCY) as executor:
+        notes = list(executor.map(extract, map_prompts(chunks)))
+
+    return "\n\n".join(notes)
+
+
+async def acondense_transcript(chunks, stats):
+    """
+    Async variant of `condense_transcript`.
+    """
+    semaphore = asyncio.Semaphore(settings.GENERATION_MAP_CONCURRENCY)
+
+    async def extract(prompt):
+        async with semaphore:
+            text, usage = await acall_llm(prompt)
+        stats.add_usage(usage)
+        return text.strip()
+
+    notes = await asyncio.gather(*(extract(prompt) for prompt in map_prompts(chunks)))
+    return "\n\n".join(notes)
+
+
+def generate_quiz(transcript_text, on_question=None):
+    """
+    Generate a quiz for the transcript and return the quiz payload with generation stats.
+
+    Transcripts above GENERATION_MAP_REDUCE_THRESHOLD_TOKENS are condensed chunk by chunk
+    first, and the questions are generated from the condensed key facts. `on_question`
+    is called with each question while the response streams in.
+    """
+    chunks, stats = start_generation(transcript_text)
+
+    notes = None
+    if chunks:
+        with stats.timed("map"):
+            notes = condense_transcript(chunks, stats)
+        stats.data["condensed_tokens"] = count_tokens(notes)
+
+    quiz_data = complete_quiz(quiz_prompt(transcript_text, notes), stats, on_question)
+    return finish_generation(quiz_data, stats)
+
+
+async def agenerate_quiz(transcript_text, on_question=None):
+    """
+    Async variant of `generate_quiz`; LLM calls are awaited on the client's asyncio transport.
+    """
+    chunks, stats = start_generation(transcript_text)
+
+    notes = None
+    if chunks:
+        with stats.timed("map"):
+            notes = await acondense_transcript(chunks, stats)
+        stats.data["condensed_tokens"] = count_tokens(notes)
+
+    quiz_data = await acomplete_quiz(quiz_prompt(transcript_text, notes), stats, on_question)
+    return finish_generation(quiz_data, stats)
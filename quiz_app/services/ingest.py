@@ -0,0 +1,122 @@
+from django.conf import settings
+
+
+class IngestRejected(Exception):
+    """
+    Raised when a video or playlist exceeds the ingest limits; nothing has been downloaded at that point.
+    Also raised when preprocessing finds no speech in the audio.
+    """
+
+
+def ydl_options(**extra):
+    """
+    Return the yt_dlp options shared by metadata lookups, downloads and streaming.
+    """
+    options = {
+        "js_runtimes": {
+            "node": {}
+        },
+        "remote_components": [
+            "ejs:github"
+        ],
+        "format": settings.INGEST_AUDIO_FORMAT,
+        "quiet": True,
+        "noplaylist": True,
+    }
+    options.update(extra)
+    return options
+
+
+def probe(url):
+    """
+    Fetch the metadata of `url` and resolve the audio format without downloading anything.
+    The result can be handed to `YoutubeDL.process_ie_result` to download the selected format.
+    """
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(ydl_options()) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def expand_playlist(url, max_items):
+    """
+    Return the title and the video URLs of the playlist `url`.
+
+    Only the playlist itself is fetched, not the metadata of every video. A plain video
+    URL yields just that video. Raises IngestRejected for more than `max_items` videos.
+    """
+    import yt_dlp
+
+    # Fetch one entry more than allowed, to tell a full playlist from an oversized one.
+    options = ydl_options(noplaylist=False, extract_flat="in_playlist", playlistend=max_items + 1)
+    try:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError as exc:
+        raise IngestRejected(f"The playlist could not be read: {exc}") from exc
+
+    if info.get("entries") is None:
+        return info.get("title") or "", [info.get("webpage_url") or url]
+
+    urls = [entry.get("url") or entry.get("webpage_url") for entry in info["entries"] if entry]
+    urls = [entry_url for entry_url in urls if entry_url]
+    if len(urls) > max_items:
+        raise IngestRejected(f"The playlist has more than {max_items} videos.")
+    if not urls:
+        raise IngestRejected("The playlist has no videos.")
+    return info.get("title") or "", urls
+
+
+def estimated_size(info):
+    """
+    Return the size in bytes of the selected audio format, estimated from its bitrate if unknown.
+    """
+    size = info.get("filesize") or info.get("filesize_approx")
+    if size:
+        return size
+    bitrate = info.get("abr") or info.get("tbr")
+    if bitrate and info.get("duration"):
+        return int(bitrate * 1000 / 8 * info["duration"])
+    return None
+
+
+def plan_range(info, time_range=None):
+    """
+    Check a probed video against the ingest limits and return the (start, end) seconds to
+    fetch, or None for the whole video.
+
+    Live streams are rejected. Videos longer than INGEST_MAX_DURATION_SECONDS are clipped
+    to their first part, or rejected with INGEST_OVER_LIMIT=reject; an explicit
+    `time_range` is checked the same way. Raises IngestRejected.
+    """
+    if info.get("is_live") or info.get("live_status") in ("is_live", "is_upcoming"):
+        raise IngestRejected("Live streams cannot be turned into quizzes.")
+
+    duration = info.get("duration")
+    start, end = time_range or (None, None)
+    start = start or 0
+    if duration is not None:
+        if start >= duration:
+            raise IngestRejected(f"The start time is beyond the end of the video ({duration:.0f}s).")
+        end = min(end, duration) if end is not None else duration
+
+    max_seconds = settings.INGEST_MAX_DURATION_SECONDS
+    if max_seconds and (end is None or end - start > max_seconds):
+        if end is not None and settings.INGEST_OVER_LIMIT == "reject":
+            raise IngestRejected(
+                f"The video is {(end - start) / 60:.0f} minutes long, the limit is {max_seconds / 60:.0f} minutes."
+            )
+        # Without a known duration the clip is the only upper bound we have.
+        end = start + max_seconds
+
+    size = estimated_size(info)
+    if size and duration and settings.INGEST_MAX_BYTES:
+        expected = size * (end - start) / duration
+        if expected > settings.INGEST_MAX_BYTES:
+            raise IngestRejected(
+                f"The audio would be about {expected / 2**20:.0f} MB, the limit is {settings.INGEST_MAX_BYTES / 2**20:.0f} MB."
+            )
+
+    if start == 0 and duration is not None and end >= duration:
+        return None
+    return (start, end)
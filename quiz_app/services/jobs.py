@@ -0,0 +1,469 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from .processes import setup_django, spawn_context
+
+logger = logging.getLogger(__name__)
+
+# How often server processes look for jobs whose worker died, in local dispatch mode.
+RECOVERY_INTERVAL_SECONDS = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_recovery_started = False
+
+
+def get_executor():
+    """
+    Return the process pool that runs quiz jobs, creating it on first use.
+
+    The pool uses the spawn start method so worker processes never inherit
+    the web server's threads or open sockets. Each process keeps its own
+    Whisper model in the model registry between jobs.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.QUIZ_JOB_WORKERS,
+                mp_context=spawn_context(),
+                initializer=setup_django,
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    """
+    Drop a broken pool, so the next submission starts a new one.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _job_done(job_id, owner, executor, future):
+    """
+    Submit the video jobs a playlist job created, and clean up after a job whose pool
+    broke, e.g. because a worker was killed for running out of memory.
+
+    Jobs that had not started yet are resubmitted to a new pool. The job that was running
+    is marked failed rather than retried, since it may be what killed the worker, unless
+    it has been requeued and claimed under another owner meanwhile.
+    """
+    if future.cancelled():
+        return
+    if future.exception() is None:
+        if isinstance(future.result(), list):
+            for video_job_id in future.result():
+                submit_job(video_job_id)
+        return
+    if not isinstance(future.exception(), BrokenProcessPool):
+        return
+
+    from django.db import connection
+    from django.utils import timezone
+    from ..models import QuizJob
+    from .metrics import registry
+
+    _discard_executor(executor)
+    registry.prune()
+    try:
+        failed = QuizJob.objects.filter(pk=job_id, owner=owner, status=QuizJob.Status.RUNNING).update(
+            status=QuizJob.Status.FAILED,
+            error='The worker process running this job exited unexpectedly.',
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if failed:
+            logger.error('Quiz job %s failed because its worker process died', job_id)
+        elif QuizJob.objects.filter(pk=job_id, status=QuizJob.Status.PENDING).exists():
+            submit_job(job_id)
+    except Exception:
+        logger.exception('Could not recover quiz job %s after its worker pool broke', job_id)
+    finally:
+        connection.close()
+
+
+def submit_job(job_id):
+    """
+    Hand a committed job to the worker pool right away.
+
+    A pool that broke because one of its processes died is replaced. With
+    QUIZ_JOB_DISPATCH=queue the pending QuizJob row is the queue entry and
+    a `run_quiz_worker` process picks it up, so nothing happens here.
+    """
+    if settings.QUIZ_JOB_DISPATCH == 'queue':
+        return None
+    # The pool process claims the job under this token, so a broken pool only fails its own claim.
+    owner = owner_token()
+    executor = get_executor()
+    try:
+        future = executor.submit(run_job, job_id, owner, claim=True)
+    except BrokenProcessPool:
+        logger.warning('The quiz job pool is broken, starting a new one')
+        _discard_executor(executor)
+        executor = get_executor()
+        future = executor.submit(run_job, job_id, owner, claim=True)
+    future.add_done_callback(lambda done: _job_done(job_id, owner, executor, done))
+    return future
+
+
+def enqueue_job(job):
+    """
+    Schedule `job` on the worker pool once the surrounding transaction has committed.
+    """
+    transaction.on_commit(lambda: submit_job(job.pk))
+
+
+def recover_jobs(pending=False):
+    """
+    Resubmit jobs to this process's pool whose worker is gone: running jobs without
+    a heartbeat and, with `pending`, jobs that have been pending for longer than
+    QUIZ_JOB_STALE_SECONDS, e.g. because the server that queued them was restarted.
+
+    Jobs that were queued recently are most likely waiting in the pool of another live
+    process and are left alone. Jobs are claimed when they start, so a job that is also
+    queued elsewhere still runs once.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from ..models import QuizJob
+
+    job_ids = requeue_stale_jobs()
+    if pending:
+        cutoff = timezone.now() - timedelta(seconds=settings.QUIZ_JOB_STALE_SECONDS)
+        job_ids += list(
+            QuizJob.objects.filter(status=QuizJob.Status.PENDING, updated_at__lt=cutoff)
+            .exclude(pk__in=job_ids)
+            .order_by('created_at', 'id')
+            .values_list('pk', flat=True)
+        )
+    for job_id in job_ids:
+        submit_job(job_id)
+    return job_ids
+
+
+def start_job_recovery():
+    """
+    Start the background thread of a server process that picks up orphaned jobs in
+    local dispatch mode: pending jobs left over from before a restart once, and jobs
+    whose worker died every RECOVERY_INTERVAL_SECONDS.
+    """
+    global _recovery_started
+    if settings.QUIZ_JOB_DISPATCH == 'queue' or settings.QUIZZLY_ROLE != 'all' or _recovery_started:
+        return
+    _recovery_started = True
+
+    def recover():
+        from django.db import connection
+
+        pending = True
+        while True:
+            try:
+                recovered = recover_jobs(pending=pending)
+                if recovered:
+                    logger.warning('Resubmitted %d orphaned quiz jobs', len(recovered))
+                pending = False
+            except Exception:
+                logger.exception('Recovering orphaned quiz jobs failed')
+            finally:
+                connection.close()
+            time.sleep(RECOVERY_INTERVAL_SECONDS)
+
+    threading.Thread(target=recover, name='quiz-job-recovery', daemon=True).start()
+
+
+def create_batch(user, urls):
+    """
+    Create a QuizBatch with one QuizJob per distinct URL and schedule all jobs.
+
+    The jobs run on the same bounded pool as single quizzes, where every worker process
+    keeps its Whisper model and LLM connections between jobs.
+    """
+    from ..models import QuizBatch
+
+    with transaction.atomic():
+        batch = QuizBatch.objects.create(creator=user)
+        for job in add_video_jobs(batch, urls):
+            enqueue_job(job)
+    return batch
+
+
+def create_playlist_batch(user, playlist_url):
+    """
+    Create a QuizBatch for a playlist and schedule the job that reads it.
+
+    Reading a large playlist takes a while, so it happens in the job pool like quiz
+    generation; that job adds the video jobs to the batch.
+    """
+    from ..models import QuizBatch, QuizJob
+
+    with transaction.atomic():
+        batch = QuizBatch.objects.create(creator=user, playlist_url=playlist_url)
+        enqueue_job(QuizJob.objects.create(
+            creator=user, batch=batch, video_url=playlist_url, kind=QuizJob.Kind.PLAYLIST,
+        ))
+    return batch
+
+
+def add_video_jobs(batch, urls):
+    """
+    Create one pending QuizJob in `batch` per distinct URL and return the jobs, without scheduling them.
+    """
+    from ..models import QuizJob
+
+    return QuizJob.objects.bulk_create([
+        QuizJob(creator_id=batch.creator_id, batch=batch, video_url=url)
+        for url in dict.fromkeys(urls)
+    ])
+
+
+def owner_token():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def claim_job(job_id, owner=None):
+    """
+    Mark a pending job as running in this process and return the owner token of the claim,
+    or None if the job is no longer pending. A new token is made unless `owner` is given.
+
+    The claim is a conditional update from pending to running, so concurrent workers
+    never run the same job. Only the owner may record progress and results afterwards.
+    """
+    from django.utils import timezone
+    from ..models import QuizJob
+
+    owner = owner or owner_token()
+    now = timezone.now()
+    claimed = QuizJob.objects.filter(pk=job_id, status=QuizJob.Status.PENDING).update(
+        status=QuizJob.Status.RUNNING, owner=owner, started_at=now, heartbeat_at=now, updated_at=now,
+    )
+    return owner if claimed else None
+
+
+def claim_next_job():
+    """
+    Claim the oldest pending job and return (job id, owner token), or None if there is none.
+    """
+    from ..models import QuizJob
+
+    while True:
+        job_id = (
+            QuizJob.objects.filter(status=QuizJob.Status.PENDING)
+            .order_by('created_at', 'id')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        owner = claim_job(job_id)
+        if owner is not None:
+            return job_id, owner
+
+
+def requeue_stale_jobs():
+    """
+    Put running jobs back in the queue when their worker has not sent a heartbeat for
+    QUIZ_JOB_STALE_SECONDS, e.g. because it was killed. Returns the ids of the requeued jobs.
+    """
+    from datetime import timedelta
+    from django.db.models import Q
+    from django.utils import timezone
+    from ..models import QuizJob
+
+    cutoff = timezone.now() - timedelta(seconds=settings.QUIZ_JOB_STALE_SECONDS)
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, updated_at__lt=cutoff)
+    candidates = QuizJob.objects.filter(stale, status=QuizJob.Status.RUNNING).values_list('pk', 'owner')
+
+    requeued = []
+    for job_id, owner in list(candidates):
+        # Conditional on the owner, so a heartbeat or a second requeuer in between wins.
+        if QuizJob.objects.filter(stale, pk=job_id, owner=owner, status=QuizJob.Status.RUNNING).update(
+            status=QuizJob.Status.PENDING, stage=QuizJob.Stage.QUEUED, progress=0,
+            owner='', heartbeat_at=None, updated_at=timezone.now(),
+        ):
+            requeued.append(job_id)
+    if requeued:
+        logger.warning('Requeued %d stale quiz jobs: %s', len(requeued), requeued)
+    discard_unfinished_quizzes(cutoff)
+    return requeued
+
+
+def discard_unfinished_quizzes(cutoff):
+    """
+    Delete streamed quizzes created before `cutoff` that never got all their questions
+    and whose job is not running any more, e.g. because the worker died.
+    """
+    from ..models import Quiz, QuizJob
+
+    deleted, _ = (
+        Quiz.objects.filter(ready=False, created_at__lt=cutoff)
+        .exclude(jobs__status=QuizJob.Status.RUNNING)
+        .delete()
+    )
+    if deleted:
+        logger.warning('Deleted %d unfinished quiz rows', deleted)
+
+
+def _update_job(job_id, owner, **fields):
+    """
+    Update a job this process owns; returns False if the job has been taken over meanwhile.
+    """
+    from django.utils import timezone
+    from ..models import QuizJob
+
+    now = timezone.now()
+    return bool(QuizJob.objects.filter(pk=job_id, owner=owner).update(updated_at=now, heartbeat_at=now, **fields))
+
+
+@contextmanager
+def heartbeat(job_id, owner):
+    """
+    Refresh the heartbeat of a running job every QUIZ_JOB_HEARTBEAT_SECONDS in a background thread,
+    so long stages without progress updates are not mistaken for a dead worker.
+    """
+    from django.db import connection
+
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.QUIZ_JOB_HEARTBEAT_SECONDS):
+                if not _update_job(job_id, owner):
+                    logger.warning('Quiz job %s is no longer owned by this worker', job_id)
+                    return
+        except Exception:
+            logger.exception('Heartbeat of quiz job %s failed', job_id)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'quiz-job-{job_id}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_playlist_job(job, owner):
+    """
+    Read the playlist of a playlist job and add its videos to the job's batch.
+
+    Returns the ids of the new video jobs. They are created pending but not submitted:
+    in a pool process the caller's process has to submit them to its own pool.
+    """
+    from django.utils import timezone
+    from ..models import QuizBatch, QuizJob
+    from .ingest import expand_playlist
+    from .video import normalize_video_url
+
+    try:
+        with heartbeat(job.pk, owner):
+            title, urls = expand_playlist(job.video_url, settings.QUIZ_BATCH_MAX_ITEMS)
+    except Exception as exc:
+        logger.exception('Playlist job %s failed', job.pk)
+        _update_job(
+            job.pk,
+            owner,
+            status=QuizJob.Status.FAILED,
+            error=f'{type(exc).__name__}: {exc}',
+            finished_at=timezone.now(),
+        )
+        return []
+
+    with transaction.atomic():
+        if not _update_job(
+            job.pk,
+            owner,
+            status=QuizJob.Status.SUCCEEDED,
+            stage=QuizJob.Stage.DONE,
+            progress=100,
+            finished_at=timezone.now(),
+        ):
+            logger.warning('Playlist job %s was taken over by another worker', job.pk)
+            return []
+        QuizBatch.objects.filter(pk=job.batch_id).update(title=title[:255], updated_at=timezone.now())
+        batch = QuizBatch(pk=job.batch_id, creator_id=job.creator_id)
+        return [video_job.pk for video_job in add_video_jobs(batch, [normalize_video_url(url) for url in urls])]
+
+
+def run_job(job_id, owner=None, claim=False):
+    """
+    Execute a quiz job and record its stage, progress and result on the QuizJob row.
+
+    `owner` is the token of a claim made by the caller; without it, or with `claim`, the
+    job is claimed here, under `owner` if given.
+    A job that was requeued and claimed by another worker meanwhile is not overwritten,
+    and the quiz this run produced is discarded. Returns the id of the quiz, or for a
+    playlist job the list of video job ids it created.
+    """
+    from django.db import close_old_connections
+    from django.utils import timezone
+    from ..models import QuizJob
+    from .pipeline import run_pipeline
+
+    close_old_connections()
+    if owner is None or claim:
+        owner = claim_job(job_id, owner)
+        if owner is None:
+            logger.info('Quiz job %s is not pending any more, skipping it', job_id)
+            return None
+    job = QuizJob.objects.select_related('creator').get(pk=job_id)
+    if job.kind == QuizJob.Kind.PLAYLIST:
+        return run_playlist_job(job, owner)
+
+    def on_progress(stage, progress):
+        _update_job(job_id, owner, stage=stage, progress=progress)
+
+    def on_question(quiz, question):
+        # Link the quiz as soon as it exists, so its questions can be streamed to the client.
+        if job.quiz_id != quiz.pk:
+            job.quiz_id = quiz.pk
+            _update_job(job_id, owner, quiz=quiz)
+
+    try:
+        with heartbeat(job_id, owner):
+            quiz = run_pipeline(
+                job.video_url,
+                job.creator,
+                on_progress=on_progress,
+                time_range=job.time_range,
+                on_question=on_question,
+            )
+    except Exception as exc:
+        logger.exception('Quiz job %s failed', job_id)
+        _update_job(
+            job_id,
+            owner,
+            status=QuizJob.Status.FAILED,
+            error=f'{type(exc).__name__}: {exc}',
+            finished_at=timezone.now(),
+        )
+        return None
+
+    if not _update_job(
+        job_id,
+        owner,
+        status=QuizJob.Status.SUCCEEDED,
+        stage=QuizJob.Stage.DONE,
+        progress=100,
+        quiz=quiz,
+        finished_at=timezone.now(),
+    ):
+        logger.warning('Quiz job %s was taken over by another worker, discarding quiz %s', job_id, quiz.pk)
+        quiz.delete()
+        return None
+    return quiz.pk
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+class LLMTimeout(Exception):
+    """
+    Raised when a call could not be completed before its deadline.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that allows `rate` calls per second with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """
+        Take a token if one is available and return 0, otherwise return the seconds to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, deadline):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise LLMTimeout('Rate limit wait exceeds the call deadline')
+            time.sleep(wait)
+
+    async def aacquire(self, deadline):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise LLMTimeout('Rate limit wait exceeds the call deadline')
+            await asyncio.sleep(wait)
+
+
+def is_retryable(exc):
+    """
+    Retry rate limiting, server errors, timeouts and dropped connections.
+    """
+    import httpx
+    from google.genai import errors
+
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class LLMGateway:
+    """
+    Process-wide access point for Gemini calls.
+
+    Holds one long-lived genai client, so HTTP connections are pooled and reused
+    between requests, plus one per event loop for async calls, since the async
+    transport of a client is bound to the loop that first used it. Applies the same
+    limits to every call of the process: a cap on in-flight calls, a token-bucket
+    rate limit, retries with exponential backoff and jitter, and a deadline per call
+    that covers all retries.
+    """
+
+    def __init__(self, api_key, base_url=None, timeout=120, deadline=300, max_concurrency=8,
+                 rate_per_minute=60, burst=10, max_attempts=4):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _create_client(self):
+        from google import genai
+        from google.genai import types
+
+        http_options = types.HttpOptions(timeout=int(self.timeout * 1000))
+        if self.base_url:
+            http_options.base_url = self.base_url
+        return genai.Client(api_key=self.api_key, http_options=http_options)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    @property
+    def aio(self):
+        """
+        Async client of the running event loop. async_to_sync runs each call on a new
+        loop, so clients are kept per loop and dropped together with it.
+        """
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = self._create_client()
+        return client.aio
+
+    def _config(self, config, call_deadline):
+        """
+        Return a copy of `config` whose HTTP timeout does not run past the call deadline.
+        """
+        from google.genai import types
+
+        remaining = call_deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeout('LLM call deadline exceeded')
+        if isinstance(config, types.GenerateContentConfig):
+            config = config.model_copy()
+        else:
+            config = types.GenerateContentConfig.model_validate(config or {})
+        config.http_options = types.HttpOptions(timeout=int(min(self.timeout, remaining) * 1000))
+        return config
+
+    def _retrying(self, retrying_class, deadline):
+        return retrying_class(
+            stop=stop_after_attempt(self.max_attempts) | stop_after_delay(deadline),
+            wait=wait_random_exponential(multiplier=1, max=20),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+            reraise=True,
+        )
+
+    def _acquire_slot(self, call_deadline):
+        if not self.semaphore.acquire(timeout=max(0, call_deadline - time.monotonic())):
+            raise LLMTimeout('No free LLM slot before the call deadline')
+
+    async def _aacquire_slot(self, call_deadline):
+        while not self.semaphore.acquire(blocking=False):
+            if time.monotonic() >= call_deadline:
+                raise LLMTimeout('No free LLM slot before the call deadline')
+            await asyncio.sleep(0.05)
+
+    def generate(self, contents, model=None, config=None, deadline=None):
+        """
+        Call generate_content and return the response.
+        """
+        deadline = deadline or self.deadline
+        call_deadline = time.monotonic() + deadline
+        model = model or settings.GENAI_MODEL
+
+        for attempt in self._retrying(Retrying, deadline):
+            with attempt:
+                self.bucket.acquire(call_deadline)
+                self._acquire_slot(call_deadline)
+                try:
+                    return self.client.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=self._config(config, call_deadline),
+                    )
+                finally:
+                    self.semaphore.release()
+
+    def generate_stream(self, contents, model=None, config=None, deadline=None):
+        """
+        Call generate_content_stream and yield the response chunks.
+
+        Only opening the stream is retried; a stream that breaks after the first
+        chunk raises, since its partial output has already been handed out.
+        """
+        deadline = deadline or self.deadline
+        call_deadline = time.monotonic() + deadline
+        model = model or settings.GENAI_MODEL
+
+        for attempt in self._retrying(Retrying, deadline):
+            with attempt:
+                self.bucket.acquire(call_deadline)
+                self._acquire_slot(call_deadline)
+                try:
+                    stream = self.client.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=self._config(config, call_deadline),
+                    )
+                    first = next(stream, None)
+                except BaseException:
+                    self.semaphore.release()
+                    raise
+
+        try:
+            if first is not None:
+                yield first
+            for chunk in stream:
+                if time.monotonic() > call_deadline:
+                    raise LLMTimeout('LLM call deadline exceeded')
+                yield chunk
+        finally:
+            self.semaphore.release()
+
+    async def agenerate(self, contents, model=None, config=None, deadline=None):
+        """
+        Async variant of `generate` on the client's native asyncio transport.
+        """
+        deadline = deadline or self.deadline
+        call_deadline = time.monotonic() + deadline
+        model = model or settings.GENAI_MODEL
+
+        async for attempt in self._retrying(AsyncRetrying, deadline):
+            with attempt:
+                await self.bucket.aacquire(call_deadline)
+                await self._aacquire_slot(call_deadline)
+                try:
+                    return await self.aio.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=self._config(config, call_deadline),
+                    )
+                finally:
+                    self.semaphore.release()
+
+    async def agenerate_stream(self, contents, model=None, config=None, deadline=None):
+        """
+        Async variant of `generate_stream`.
+        """
+        deadline = deadline or self.deadline
+        call_deadline = time.monotonic() + deadline
+        model = model or settings.GENAI_MODEL
+
+        async for attempt in self._retrying(AsyncRetrying, deadline):
+            with attempt:
+                await self.bucket.aacquire(call_deadline)
+                await self._aacquire_slot(call_deadline)
+                try:
+                    stream = await self.aio.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=self._config(config, call_deadline),
+                    )
+                    first = await anext(stream, None)
+                except BaseException:
+                    self.semaphore.release()
+                    raise
+
+        try:
+            if first is not None:
+                yield first
+            async for chunk in stream:
+                if time.monotonic() > call_deadline:
+                    raise LLMTimeout('LLM call deadline exceeded')
+                yield chunk
+        finally:
+            self.semaphore.release()
+
+
+def get_gateway():
+    """
+    Return the LLM gateway of this process, configured from settings.
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway(
+                    api_key=settings.GENAI_API_KEY,
+                    base_url=settings.GENAI_BASE_URL,
+                    timeout=settings.LLM_TIMEOUT_SECONDS,
+                    deadline=settings.LLM_DEADLINE_SECONDS,
+                    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                    rate_per_minute=settings.LLM_RATE_PER_MINUTE,
+                    burst=settings.LLM_BURST,
+                    max_attempts=settings.LLM_MAX_ATTEMPTS,
+                )
+    return _gateway
@@ -0,0 +1,153 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .audio import SAMPLE_RATE, quietest_index
+from .processes import setup_django, spawn_context, threads_per_process
+from .transcription import shift_segments
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker_backend = None
+_job_workers = None
+
+
+def _init_worker(threads):
+    """
+    Load a private copy of the transcription model in a pool process, pinned to `threads` CPU threads.
+    """
+    global _worker_backend
+
+    setup_django()
+    from .transcription import create_pinned_backend
+
+    _worker_backend = create_pinned_backend(threads)
+    _worker_backend.get_model()
+
+
+def _transcribe_window(samples, offset):
+    return shift_segments(_worker_backend.transcribe(samples), offset)
+
+
+def set_job_workers(count):
+    """
+    Tell this process how many job workers run next to it, `QUIZ_JOB_WORKERS` by default.
+    """
+    global _job_workers
+    _job_workers = count
+
+
+def pool_size():
+    """
+    Number of long audio processes this job worker may start.
+
+    LONG_AUDIO_PROCESSES is the budget for the whole host, and every job worker has a
+    pool of its own, so each one gets an equal share of it.
+    """
+    return settings.LONG_AUDIO_PROCESSES // max(1, _job_workers or settings.QUIZ_JOB_WORKERS)
+
+
+def get_executor():
+    """
+    Return the process pool for long audio, creating it on first use.
+
+    Each process loads its own model once and keeps it for the lifetime of the pool.
+    The cores are split between the processes of all job workers' pools.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            processes = pool_size()
+            job_workers = max(1, _job_workers or settings.QUIZ_JOB_WORKERS)
+            _executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=spawn_context(),
+                initializer=_init_worker,
+                initargs=(threads_per_process(processes * job_workers),),
+            )
+        return _executor
+
+
+def plan_windows(samples, window_seconds, overlap_seconds, search_seconds=15):
+    """
+    Split `samples` into windows of roughly `window_seconds`, cut where it is quiet.
+
+    Each cut is placed in the 100 ms frame with the lowest energy within `search_seconds`
+    of the nominal boundary; this is not a voice activity check, so in continuous speech
+    or music the cut may still fall inside a word. Returns (start, end, core_start,
+    core_end) sample indices: the window covers start..end, which extends the core
+    region by `overlap_seconds` on both sides so words at a cut are heard in full by
+    both neighbours.
+    """
+    total = samples.size
+    window = int(window_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+
+    cuts = [0]
+    while total - cuts[-1] > window + search:
+        target = cuts[-1] + window
+        low, high = target - search, target + search
+        cuts.append(low + quietest_index(samples[low:high]))
+    cuts.append(total)
+
+    return [
+        (max(0, core_start - overlap), min(total, core_end + overlap), core_start, core_end)
+        for core_start, core_end in zip(cuts, cuts[1:])
+    ]
+
+
+def stitch(windows, results):
+    """
+    Merge the segments of overlapping windows into one transcript.
+
+    A segment is kept only by the window whose core region contains its midpoint, so
+    speech in the overlap appears exactly once. Identical consecutive lines left at a
+    boundary are dropped as well.
+    """
+    merged = []
+    for (_start, _end, core_start, core_end), segments in zip(windows, results):
+        low, high = core_start / SAMPLE_RATE, core_end / SAMPLE_RATE
+        for segment in segments:
+            midpoint = (segment['start'] + segment['end']) / 2
+            if not low <= midpoint < high:
+                continue
+            if merged and merged[-1]['text'].strip() == segment['text'].strip():
+                continue
+            merged.append(segment)
+    return merged
+
+
+def transcribe_long_audio(samples, on_progress=None):
+    """
+    Transcribe a long 16 kHz float32 recording in parallel windows and return the stitched segments.
+    `on_progress(fraction)` is called whenever a window is done.
+    """
+    windows = plan_windows(
+        samples,
+        settings.LONG_AUDIO_WINDOW_SECONDS,
+        settings.LONG_AUDIO_OVERLAP_SECONDS,
+    )
+    logger.info('Transcribing %.0fs of audio in %d windows', samples.size / SAMPLE_RATE, len(windows))
+
+    executor = get_executor()
+    futures = [
+        executor.submit(_transcribe_window, samples[start:end], start / SAMPLE_RATE)
+        for start, end, _core_start, _core_end in windows
+    ]
+    if on_progress is not None:
+        for done, _future in enumerate(as_completed(futures), start=1):
+            on_progress(done / len(futures))
+    return stitch(windows, [future.result() for future in futures])
+
+
+def is_long_audio(duration):
+    return (
+        pool_size() > 1
+        and duration is not None
+        and duration >= settings.LONG_AUDIO_THRESHOLD_SECONDS
+    )
@@ -0,0 +1,412 @@
+import atexit
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger('quiz_app.timings')
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self.values.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labels': list(self.labelnames), 'values': values}
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, optionally split by labels.
+    Values of several processes are added up, like counters.
+    """
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets, optionally split by labels.
+    Each series stores per-bucket counts, the sum and the number of observations.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self.values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), [list(series[0]), series[1], series[2]]] for key, series in self.values.items()]
+        return {
+            'type': self.kind,
+            'help': self.documentation,
+            'labels': list(self.labelnames),
+            'buckets': list(self.buckets),
+            'values': values,
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics.
+
+    Job and transcription workers run in separate processes, so when METRICS_DIR is set
+    every process writes its snapshot there and the /metrics endpoint adds them up.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._cleanup_registered = False
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def flush(self):
+        """
+        Write this process' snapshot to METRICS_DIR, if configured.
+        """
+        if not settings.configured or not settings.METRICS_DIR:
+            return
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path = _process_file(os.getpid())
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(f'{path}.tmp', path)
+        except OSError:
+            logger.warning('Could not write metrics to %s', settings.METRICS_DIR, exc_info=True)
+            return
+        if not self._cleanup_registered:
+            self._cleanup_registered = True
+            atexit.register(discard, os.getpid())
+
+    def prune(self):
+        """
+        Remove the metrics files of processes that are no longer running.
+
+        Called when servers and workers start and after a worker died, so the metrics of
+        a previous deployment or of killed processes are not added to the current ones.
+        A file with this process' pid that it did not write is left from an earlier
+        process with the same pid.
+        """
+        if not settings.METRICS_DIR:
+            return
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                pid = int(os.path.basename(path)[:-len('.json')])
+            except ValueError:
+                continue
+            stale = not self._cleanup_registered if pid == os.getpid() else not _is_running(pid)
+            if stale:
+                discard(pid)
+
+    def collect(self):
+        """
+        Return the merged snapshot of all processes, or of this process only without METRICS_DIR.
+        """
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return merge(snapshots)
+
+
+def _process_file(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def _is_running(pid):
+    # Signal 0 only checks the pid on POSIX, on Windows os.kill would terminate the process.
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def discard(pid):
+    """
+    Remove the metrics file of process `pid`, e.g. once it has exited.
+    """
+    if not settings.METRICS_DIR:
+        return
+    try:
+        os.remove(_process_file(pid))
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.warning('Could not remove the metrics of process %s', pid, exc_info=True)
+
+
+def merge(snapshots):
+    """
+    Add up metric snapshots of several processes.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, 'values': {}})
+            for labels, value in metric['values']:
+                key = tuple(labels)
+                current = target['values'].get(key)
+                if current is None:
+                    target['values'][key] = json.loads(json.dumps(value))
+                elif metric['type'] in ('counter', 'gauge'):
+                    target['values'][key] = current + value
+                else:
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                    current[2] += value[2]
+    for metric in merged.values():
+        metric['values'] = [[list(key), value] for key, value in metric['values'].items()]
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if isinstance(value, float) and value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f'# HELP {name} {metric["help"]}')
+        lines.append(f'# TYPE {name} {metric["type"]}')
+        names = metric['labels']
+        for labels, value in sorted(metric['values']):
+            if metric['type'] in ('counter', 'gauge'):
+                lines.append(f'{name}{_format_labels(names, labels)} {_format_number(value)}')
+                continue
+            bucket_counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(metric['buckets'], bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(names, labels, [("le", _format_number(bound))])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(names, labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{_format_labels(names, labels)} {_format_number(float(total))}')
+            lines.append(f'{name}_count{_format_labels(names, labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'quizzly_stage_seconds', 'Time spent in each quiz pipeline stage.', ['stage'],
+)
+PIPELINE_SECONDS = registry.histogram(
+    'quizzly_pipeline_seconds', 'End-to-end quiz pipeline duration.', ['outcome'],
+)
+PIPELINE_RUNS = registry.counter(
+    'quizzly_pipeline_runs_total', 'Quiz pipeline runs by outcome and transcription model.', ['outcome', 'model'],
+)
+AUDIO_SECONDS = registry.histogram(
+    'quizzly_audio_duration_seconds', 'Duration of the transcribed audio.',
+    buckets=(60, 300, 600, 900, 1800, 3600, 7200, 14400, 36000),
+)
+TRANSCRIPT_CHARACTERS = registry.histogram(
+    'quizzly_transcript_characters', 'Length of the transcript sent to quiz generation.',
+    buckets=(1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000),
+)
+TRANSCRIPT_CACHE = registry.counter(
+    'quizzly_transcript_cache_total', 'Transcript cache lookups by result.', ['result'],
+)
+AUDIO_REMOVED_SECONDS = registry.counter(
+    'quizzly_audio_removed_seconds_total', 'Seconds of silence and non-speech removed before transcription.',
+)
+LLM_TOKENS = registry.counter(
+    'quizzly_llm_tokens_total', 'Tokens sent to and received from the LLM.', ['direction', 'model'],
+)
+LLM_CALLS = registry.counter(
+    'quizzly_llm_calls_total', 'LLM calls made for quiz generation.', ['model'],
+)
+MODELS_LOADED = registry.gauge(
+    'quizzly_models_loaded', 'Processes that hold a copy of each transcription model.', ['model'],
+)
+MODEL_MEMORY_BYTES = registry.gauge(
+    'quizzly_model_memory_bytes', 'Resident memory added by loading each model, over all processes.', ['model'],
+)
+
+_current_trace = contextvars.ContextVar('quizzly_pipeline_trace', default=None)
+
+
+def annotate(**fields):
+    """
+    Add fields to the timing log of the pipeline run in progress, if any.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+def observe_stage(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        timings = trace['timings']
+        timings[name] = round(timings.get(name, 0) + seconds, 3)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage into quizzly_stage_seconds and the current timing log.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def observe_model_load(model, seconds, memory_bytes):
+    observe_stage('model_load', seconds)
+    MODELS_LOADED.set(1, model=model)
+    MODEL_MEMORY_BYTES.set(memory_bytes, model=model)
+    registry.flush()
+
+
+def observe_audio(duration):
+    if duration:
+        AUDIO_SECONDS.observe(duration)
+        annotate(audio_seconds=round(duration, 1))
+
+
+def observe_transcript(text):
+    TRANSCRIPT_CHARACTERS.observe(len(text))
+    annotate(transcript_characters=len(text))
+
+
+def observe_transcript_cache(hit):
+    TRANSCRIPT_CACHE.inc(result='hit' if hit else 'miss')
+    annotate(transcript_cache='hit' if hit else 'miss')
+
+
+def observe_preprocessing(report):
+    AUDIO_REMOVED_SECONDS.inc(report['removed_seconds'])
+    annotate(preprocessing=report)
+
+
+def observe_generation(stats, model):
+    LLM_TOKENS.inc(stats['input_tokens'], direction='input', model=model)
+    LLM_TOKENS.inc(stats['output_tokens'], direction='output', model=model)
+    LLM_CALLS.inc(stats['llm_calls'], model=model)
+    annotate(
+        llm_model=model,
+        input_tokens=stats['input_tokens'],
+        output_tokens=stats['output_tokens'],
+        llm_calls=stats['llm_calls'],
+        generation_strategy=stats['strategy'],
+    )
+
+
+@contextmanager
+def trace_pipeline(url, user_id, model):
+    """
+    Collect the stage timings of one pipeline run, record the run metrics and
+    write a single JSON line to the `quiz_app.timings` logger when it ends.
+    """
+    trace = {'url': url, 'user_id': user_id, 'transcription_model': model, 'timings': {}}
+    token = _current_trace.set(trace)
+    started = time.perf_counter()
+    outcome = 'failed'
+    try:
+        yield trace
+        outcome = 'succeeded'
+    finally:
+        seconds = time.perf_counter() - started
+        _current_trace.reset(token)
+        PIPELINE_SECONDS.observe(seconds, outcome=outcome)
+        PIPELINE_RUNS.inc(outcome=outcome, model=model)
+        trace.update(outcome=outcome, total_seconds=round(seconds, 3))
+        timing_logger.info(json.dumps(trace))
+        registry.flush()
@@ -0,0 +1,87 @@
+import logging
+import os
+import resource
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def resident_memory_bytes():
+    """
+    Return the current resident set size of this process in bytes.
+    Falls back to the peak RSS where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _label(key):
+    return '/'.join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded ML models.
+
+    Every model is loaded at most once per worker process and then shared by all threads.
+    Loading is guarded by a per-key lock, so concurrent first requests for the same model
+    wait for a single load instead of allocating several copies.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """
+        Return the model stored under `key`, calling `loader()` to create it on first use.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            rss_before = resident_memory_bytes()
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+            rss_after = resident_memory_bytes()
+
+            self._models[key] = model
+            metrics.observe_model_load(_label(key), load_seconds, rss_after - rss_before)
+            logger.info(
+                'Loaded model %s in %.2fs (rss %+.1f MB, total %.1f MB)',
+                key, load_seconds, (rss_after - rss_before) / 2**20, rss_after / 2**20,
+            )
+            return model
+
+
+registry = ModelRegistry()
+
+
+def warm_up():
+    """
+    Load the configured transcription model in a background thread so the first request does not pay for it.
+    """
+    from .transcription import get_backend
+
+    thread = threading.Thread(target=lambda: get_backend().get_model(), name='whisper-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,427 @@
+import asyncio
+import contextvars
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ..models import Quiz, Question
+from . import ingest, metrics, single_flight, transcript_cache
+from .audio import SAMPLE_RATE, audio_duration, decode_stream, load_audio, prefetch
+from .generation import agenerate_quiz, generate_quiz, validate_quiz_data
+from .long_audio import is_long_audio, transcribe_long_audio
+from .preprocessing import preprocess
+from .transcription import get_backend, shift_segments, transcribe_stream
+from .video import extract_video_id
+
+_blocking_executor = None
+_blocking_executor_lock = threading.Lock()
+
+
+def download_audio(info, tmpdir, time_range=None):
+    """
+    Download the audio format selected in the probed `info` into `tmpdir` and return the file path.
+
+    The compressed audio is kept as is, since the transcription backends decode it directly.
+    With `time_range`, only that part of the audio is fetched.
+    """
+    import yt_dlp
+    from yt_dlp.utils import download_range_func
+
+    options = ingest.ydl_options(outtmpl=os.path.join(tmpdir, "audio.%(ext)s"))
+    if time_range is not None:
+        options["download_ranges"] = download_range_func(None, [time_range])
+
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.process_ie_result(info, download=True)
+        return info["requested_downloads"][0]["filepath"]
+
+
+def segment_progress(on_progress, duration):
+    """
+    Turn `on_progress(fraction)` into an `on_segment` callback for audio of `duration` seconds.
+    """
+    if on_progress is None or not duration:
+        return None
+    return lambda segment: on_progress(min(segment["end"] / duration, 1))
+
+
+def percent_reporter(report, stage, start, span):
+    """
+    Return an `on_progress(fraction)` callback that reports `stage` from `start` to
+    `start + span` percent, only when the whole percentage changes.
+    """
+    last = [None]
+
+    def on_progress(fraction):
+        progress = start + int(span * fraction)
+        if progress != last[0]:
+            last[0] = progress
+            report(stage, progress)
+
+    return on_progress
+
+
+def transcribe_audio(audio_file, on_progress=None):
+    """
+    Transcribe an audio file with the configured backend and return its segments.
+    Long recordings are split into windows and transcribed across the long audio process pool.
+    With AUDIO_PREPROCESSING, silence is cut out first and timestamps are mapped back afterwards.
+    `on_progress(fraction)` is called as the transcription advances.
+    """
+    duration = audio_duration(audio_file)
+    metrics.observe_audio(duration)
+    if settings.AUDIO_PREPROCESSING:
+        samples, time_map, _report = preprocess(load_audio(audio_file))
+        if not samples.size:
+            raise ingest.IngestRejected("No speech was found in the audio of the video.")
+        processed_duration = samples.size / SAMPLE_RATE
+        if is_long_audio(processed_duration):
+            segments = transcribe_long_audio(samples, on_progress)
+        else:
+            segments = get_backend().transcribe(samples, on_segment=segment_progress(on_progress, processed_duration))
+        return time_map.map_segments(segments)
+
+    if is_long_audio(duration):
+        return transcribe_long_audio(load_audio(audio_file), on_progress)
+    return get_backend().transcribe(audio_file, on_segment=segment_progress(on_progress, duration))
+
+
+class PreprocessedBackend:
+    """
+    Transcription backend that runs AUDIO_PREPROCESSING on every streamed window before Whisper.
+    Windows without speech are skipped and timestamps are mapped back to the window.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.speech_samples = 0
+
+    def transcribe(self, samples):
+        processed, time_map, _report = preprocess(samples)
+        self.speech_samples += processed.size
+        if not processed.size:
+            return []
+        return time_map.map_segments(self.backend.transcribe(processed))
+
+
+def stream_transcript(info, report, time_range=None):
+    """
+    Decode the remote audio stream straight to PCM and transcribe it while it is still arriving.
+    Nothing is written to disk; progress is reported relative to the length of the audio.
+    With AUDIO_PREPROCESSING, each window is preprocessed on its own.
+    """
+    start, end = time_range or (0, info.get("duration"))
+    duration = end - start if end is not None else None
+    metrics.observe_audio(duration)
+
+    report("transcribing", 10)
+    chunks = prefetch(decode_stream(info["url"], headers=info.get("http_headers"), start=start, end=end))
+    backend = get_backend()
+    if settings.AUDIO_PREPROCESSING:
+        backend = PreprocessedBackend(backend)
+    segments = []
+    # Decoding overlaps with transcription here, so both are timed together.
+    with metrics.stage("stream_transcribe"):
+        for window in transcribe_stream(backend, chunks, window_seconds=settings.STREAMING_WINDOW_SECONDS):
+            segments.extend(window)
+            if duration and segments:
+                report("transcribing", 10 + int(55 * min(segments[-1]["end"] / duration, 1)))
+    if settings.AUDIO_PREPROCESSING and not backend.speech_samples:
+        raise ingest.IngestRejected("No speech was found in the audio of the video.")
+    return segments
+
+
+def transcript_key(video_id, time_range):
+    """
+    Key of a transcript in the transcript cache; partial transcripts are stored per range,
+    with the bounds in whole milliseconds so that nearby ranges never share a key.
+    """
+    if time_range is None:
+        return video_id
+    start, end = time_range
+    start_ms = round((start or 0) * 1000)
+    end_ms = '' if end is None else round(end * 1000)
+    return f"{video_id}@{start_ms}-{end_ms}"
+
+
+def cached_transcript(video_id, model_name, time_range):
+    if video_id is None or not settings.TRANSCRIPT_CACHE_ENABLED:
+        return None
+    with metrics.stage("transcript_cache"):
+        segments = transcript_cache.get(transcript_key(video_id, time_range), model_name)
+    metrics.observe_transcript_cache(segments is not None)
+    return segments
+
+
+def get_transcript(url, report, time_range=None):
+    """
+    Return the transcript segments for `url`, from the transcript cache when possible.
+
+    A cache hit skips both the download and the transcription. Otherwise the video
+    metadata is checked against the ingest limits first, which may reject the video
+    or clip it, and only the selected audio is fetched. `time_range` is an optional
+    (start, end) in seconds; timestamps always refer to the full video.
+    """
+    video_id = extract_video_id(url)
+    backend = get_backend()
+    model_name, model_version = backend.model_id, backend.version
+
+    segments = cached_transcript(video_id, model_name, time_range)
+    if segments is not None:
+        return segments
+
+    report("downloading", 5)
+    with metrics.stage("probe"):
+        info = ingest.probe(url)
+    planned_range = ingest.plan_range(info, time_range)
+    if planned_range != time_range:
+        time_range = planned_range
+        segments = cached_transcript(video_id, model_name, time_range)
+        if segments is not None:
+            return segments
+
+    if settings.AUDIO_INGEST_MODE == "stream":
+        segments = stream_transcript(info, report, time_range)
+    else:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with metrics.stage("download"):
+                audio_file = download_audio(info, tmpdir, time_range)
+
+            report("transcribing", 30)
+            with metrics.stage("transcribe"):
+                segments = transcribe_audio(audio_file, percent_reporter(report, "transcribing", 30, 35))
+
+    if time_range is not None and time_range[0]:
+        segments = shift_segments(segments, time_range[0])
+
+    if video_id is not None:
+        transcript_cache.put(transcript_key(video_id, time_range), model_name, segments, model_version=model_version)
+    return segments
+
+
+def join_segments(segments):
+    return " ".join([segment["text"] for segment in segments])
+
+
+def persist_quiz(user, url, quiz_data, generation_stats=None):
+    """
+    Store a generated quiz and its questions for `user` in a single transaction.
+    The payload is validated first, so a malformed quiz never touches the database.
+    """
+    validate_quiz_data(quiz_data)
+
+    with metrics.stage("persist"), transaction.atomic():
+        quiz = Quiz.objects.create(
+            creator=user,
+            title=quiz_data["title"],
+            description=quiz_data["description"],
+            video_url=url,
+            generation_stats=generation_stats or {},
+        )
+        Question.objects.bulk_create([build_question(quiz, q) for q in quiz_data["questions"]])
+
+    return quiz
+
+
+def question_key(question):
+    return question["question_title"], question["question_options"], question["answer"]
+
+
+def build_question(quiz, question):
+    return Question(
+        quiz=quiz,
+        question_title=question["question_title"],
+        question_options=question["question_options"],
+        answer=question["answer"],
+    )
+
+
+class IncrementalQuiz:
+    """
+    Persists the questions of a quiz one by one while the LLM response is still streaming.
+
+    The quiz row is created with the first question, hidden from the quiz lists, and gets
+    its title and description and becomes visible in `finish()`. If the final quiz does
+    not start with the streamed questions, e.g. because the response had to be
+    repaired, its questions replace them.
+    """
+
+    def __init__(self, user, url):
+        self.user = user
+        self.url = url
+        self.quiz = None
+        self.questions = []
+
+    def add(self, question):
+        if self.quiz is None:
+            self.quiz = Quiz.objects.create(creator=self.user, video_url=self.url, ready=False)
+        build_question(self.quiz, question).save()
+        self.questions.append(question_key(question))
+
+    def finish(self, quiz_data, generation_stats=None):
+        if self.quiz is None:
+            return persist_quiz(self.user, self.url, quiz_data, generation_stats)
+        validate_quiz_data(quiz_data)
+
+        with metrics.stage("persist"), transaction.atomic():
+            self.quiz.title = quiz_data["title"]
+            self.quiz.description = quiz_data["description"]
+            self.quiz.generation_stats = generation_stats or {}
+            self.quiz.ready = True
+            self.quiz.save(update_fields=["title", "description", "generation_stats", "ready", "updated_at"])
+
+            questions = quiz_data["questions"]
+            streamed = len(self.questions)
+            if [question_key(q) for q in questions[:streamed]] != self.questions:
+                self.quiz.questions.all().delete()
+                streamed = 0
+            Question.objects.bulk_create([build_question(self.quiz, q) for q in questions[streamed:]])
+
+        return self.quiz
+
+    def discard(self):
+        if self.quiz is not None:
+            self.quiz.delete()
+            self.quiz = None
+
+
+def pipeline_key(url, time_range=None):
+    """
+    Identify the shared part of a pipeline run: the same video (range), transcription
+    model and LLM produce the same quiz, whoever asks for it.
+    """
+    parts = [url, repr(time_range), get_backend().model_id, settings.GENAI_MODEL]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def generate_for_url(url, report, time_range=None, on_question=None):
+    """
+    Transcribe `url` and generate its quiz, without persisting anything.
+    """
+    segments = get_transcript(url, report, time_range)
+    text = join_segments(segments)
+    metrics.observe_transcript(text)
+
+    report("generating", 70)
+    with metrics.stage("generate"):
+        quiz_data, generation_stats = generate_quiz(text, on_question)
+    metrics.observe_generation(generation_stats, settings.GENAI_MODEL)
+    return {"quiz": quiz_data, "generation_stats": generation_stats}
+
+
+def run_pipeline(url, user, on_progress=None, time_range=None, on_question=None):
+    """
+    Run the full download -> transcribe -> generate -> persist pipeline for one video.
+
+    `on_progress(stage, progress)` is called whenever a stage starts, with progress in percent.
+    `time_range` optionally limits the quiz to a (start, end) part of the video in seconds.
+    With `on_question(quiz, question)`, the LLM response is streamed and each question is
+    saved to a hidden quiz row and passed on as soon as it has been generated; the returned
+    quiz is the final one.
+    Concurrent runs for the same video are coalesced, only one of them transcribes and
+    calls the LLM, and each caller still gets its own quiz.
+    """
+    def report(stage, progress):
+        if on_progress is not None:
+            on_progress(stage, progress)
+
+    incremental = IncrementalQuiz(user, url) if on_question is not None else None
+
+    def question_ready(question):
+        incremental.add(question)
+        on_question(incremental.quiz, question)
+
+    stream_to = question_ready if incremental is not None else None
+
+    with metrics.trace_pipeline(url, user.pk, get_backend().model_id):
+        try:
+            if settings.SINGLE_FLIGHT_ENABLED:
+                result = single_flight.run_once(
+                    pipeline_key(url, time_range),
+                    lambda: generate_for_url(url, report, time_range, stream_to),
+                )
+            else:
+                result = generate_for_url(url, report, time_range, stream_to)
+
+            report("persisting", 90)
+            if incremental is not None:
+                return incremental.finish(result["quiz"], result["generation_stats"])
+            return persist_quiz(user, url, result["quiz"], result["generation_stats"])
+        except BaseException:
+            if incremental is not None:
+                incremental.discard()
+            raise
+
+
+def get_blocking_executor():
+    """
+    Return the thread pool that async views use for downloads and transcription.
+    """
+    global _blocking_executor
+    with _blocking_executor_lock:
+        if _blocking_executor is None:
+            _blocking_executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_BLOCKING_WORKERS,
+                thread_name_prefix='quiz-blocking',
+            )
+        return _blocking_executor
+
+
+async def run_blocking(func, *args):
+    """
+    Run blocking, CPU heavy work off the event loop and release its DB connection afterwards.
+    """
+    def call():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    # Carry context variables such as the metrics trace over to the worker thread.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(get_blocking_executor(), context.run, call)
+
+
+async def agenerate_for_url(url, report, time_range=None):
+    """
+    Async variant of `generate_for_url`.
+    """
+    segments = await run_blocking(get_transcript, url, report, time_range)
+    text = join_segments(segments)
+    metrics.observe_transcript(text)
+
+    report("generating", 70)
+    with metrics.stage("generate"):
+        quiz_data, generation_stats = await agenerate_quiz(text)
+    metrics.observe_generation(generation_stats, settings.GENAI_MODEL)
+    return {"quiz": quiz_data, "generation_stats": generation_stats}
+
+
+async def arun_pipeline(url, user, on_progress=None, time_range=None):
+    """
+    Async variant of `run_pipeline` for ASGI views.
+
+    Download and transcription run in the blocking thread pool, the LLM calls are
+    awaited natively and only the final transactional insert goes through sync_to_async.
+    """
+    def report(stage, progress):
+        if on_progress is not None:
+            on_progress(stage, progress)
+
+    with metrics.trace_pipeline(url, user.pk, get_backend().model_id):
+        if settings.SINGLE_FLIGHT_ENABLED:
+            result = await single_flight.arun_once(
+                pipeline_key(url, time_range),
+                lambda: agenerate_for_url(url, report, time_range),
+            )
+        else:
+            result = await agenerate_for_url(url, report, time_range)
+
+        report("persisting", 90)
+        return await sync_to_async(persist_quiz)(user, url, result["quiz"], result["generation_stats"])
@@ -0,0 +1,187 @@
+import bisect
+import logging
+from fractions import Fraction
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .audio import FRAME_SECONDS, SAMPLE_RATE, frame_energy
+
+logger = logging.getLogger(__name__)
+
+TIME_STRETCH_CHUNK = SAMPLE_RATE
+
+
+class TimeMap:
+    """
+    Maps timestamps of preprocessed audio back to the original recording.
+
+    `spans` are the (start, end) seconds of the original audio that were kept, in
+    order; the processed audio is their concatenation played `speed` times faster.
+    """
+
+    def __init__(self, spans, speed=1.0):
+        self.spans = spans
+        self.speed = speed
+        self.offsets = []
+        total = 0.0
+        for start, end in spans:
+            self.offsets.append(total)
+            total += end - start
+
+    def to_original(self, seconds):
+        if not self.spans:
+            return seconds * self.speed
+        position = seconds * self.speed
+        index = max(0, bisect.bisect_right(self.offsets, position) - 1)
+        start, end = self.spans[index]
+        return min(start + position - self.offsets[index], end)
+
+    def map_segments(self, segments):
+        return [
+            {**segment, 'start': self.to_original(segment['start']), 'end': self.to_original(segment['end'])}
+            for segment in segments
+        ]
+
+
+def merge_spans(spans, min_silence, padding, total):
+    """
+    Pad speech spans and join those separated by less than `min_silence` seconds.
+    """
+    merged = []
+    for start, end in spans:
+        start, end = max(0.0, start - padding), min(total, end + padding)
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def energy_speech_spans(samples):
+    """
+    Find speech by frame energy: frames well above the noise floor count as speech.
+    Cheap and dependency free, but treats music as speech.
+    """
+    energy = frame_energy(samples)
+    if energy.size == 0:
+        return []
+    threshold = max(np.percentile(energy, 10) * 3, 1e-3)
+    voiced = energy > threshold
+
+    spans = []
+    start = None
+    for index, is_voiced in enumerate(voiced):
+        if is_voiced and start is None:
+            start = index
+        elif not is_voiced and start is not None:
+            spans.append((start * FRAME_SECONDS, index * FRAME_SECONDS))
+            start = None
+    if start is not None:
+        spans.append((start * FRAME_SECONDS, samples.size / SAMPLE_RATE))
+    return spans
+
+
+def silero_speech_spans(samples):
+    """
+    Find speech with the Silero VAD model bundled with faster-whisper, which also skips music.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    options = VadOptions(min_silence_duration_ms=int(settings.AUDIO_MIN_SILENCE_SECONDS * 1000), speech_pad_ms=0)
+    return [
+        (timestamp['start'] / SAMPLE_RATE, timestamp['end'] / SAMPLE_RATE)
+        for timestamp in get_speech_timestamps(samples, options)
+    ]
+
+
+def speech_spans(samples):
+    """
+    Return the (start, end) seconds of speech in `samples`, padded and merged.
+    """
+    spans = None
+    if settings.AUDIO_VAD == 'silero':
+        try:
+            spans = silero_speech_spans(samples)
+        except ImportError:
+            logger.warning('faster-whisper is not installed, falling back to the energy VAD')
+    if spans is None:
+        spans = energy_speech_spans(samples)
+    return merge_spans(
+        spans,
+        min_silence=settings.AUDIO_MIN_SILENCE_SECONDS,
+        padding=settings.AUDIO_SPEECH_PAD_SECONDS,
+        total=samples.size / SAMPLE_RATE,
+    )
+
+
+def time_stretch(samples, speed):
+    """
+    Speed up `samples` by `speed` without changing the pitch, using ffmpeg's atempo filter.
+    """
+    import av
+
+    graph = av.filter.Graph()
+    source = graph.add_abuffer(format='flt', sample_rate=SAMPLE_RATE, layout='mono', time_base=Fraction(1, SAMPLE_RATE))
+    tempo = graph.add('atempo', str(speed))
+    sink = graph.add('abuffersink')
+    source.link_to(tempo)
+    tempo.link_to(sink)
+    graph.configure()
+
+    output = []
+
+    def drain():
+        while True:
+            try:
+                output.append(graph.pull().to_ndarray().reshape(-1))
+            except (av.error.BlockingIOError, av.error.EOFError):
+                return
+
+    for start in range(0, samples.size, TIME_STRETCH_CHUNK):
+        frame = av.AudioFrame.from_ndarray(samples[start:start + TIME_STRETCH_CHUNK].reshape(1, -1), format='flt', layout='mono')
+        frame.sample_rate = SAMPLE_RATE
+        frame.pts = start
+        frame.time_base = Fraction(1, SAMPLE_RATE)
+        graph.push(frame)
+        drain()
+    graph.push(None)
+    drain()
+
+    if not output:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(output).astype(np.float32, copy=False)
+
+
+def preprocess(samples):
+    """
+    Cut silence and non-speech out of 16 kHz mono `samples` and optionally speed up what is left.
+
+    Returns the processed samples, a TimeMap back to the original timeline and a report
+    of how much audio was removed.
+    """
+    total = samples.size / SAMPLE_RATE
+    with metrics.stage('preprocess'):
+        spans = speech_spans(samples)
+        if spans:
+            processed = np.concatenate([samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] for start, end in spans])
+        else:
+            processed = np.zeros(0, dtype=np.float32)
+        speech = processed.size / SAMPLE_RATE
+
+        speed = settings.AUDIO_SPEED
+        if speed != 1.0 and processed.size:
+            processed = time_stretch(processed, speed)
+
+    report = {
+        'original_seconds': round(total, 1),
+        'speech_seconds': round(speech, 1),
+        'removed_seconds': round(total - speech, 1),
+        'removed_ratio': round((total - speech) / total, 3) if total else 0.0,
+        'speed': speed,
+        'processed_seconds': round(processed.size / SAMPLE_RATE, 1),
+    }
+    metrics.observe_preprocessing(report)
+    logger.info('Preprocessed audio: %s', report)
+    return processed, TimeMap(spans, speed), report
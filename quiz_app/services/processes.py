@@ -0,0 +1,43 @@
+import multiprocessing
+import os
+
+
+def spawn_context():
+    """
+    Multiprocessing context for worker pools.
+
+    Spawned processes never inherit the web server's threads, locks or open sockets.
+    """
+    return multiprocessing.get_context('spawn')
+
+
+def threads_per_process(processes):
+    """
+    Split the available cores evenly between `processes` worker processes.
+    """
+    return max(1, (os.cpu_count() or 1) // processes)
+
+
+def pin_threads(threads):
+    """
+    Limit the native thread pools (OpenMP, MKL, OpenBLAS) of this process to `threads`.
+    Must run before numpy or torch are imported.
+    """
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(threads)
+
+
+def setup_django():
+    """
+    Prepare a freshly started pool process: set up Django and drop inherited DB connections.
+    """
+    import django
+    from django.apps import apps
+    from django.db import connections
+
+    if not apps.ready:
+        from core.roles import settings_module
+
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module())
+        django.setup()
+    connections.close_all()
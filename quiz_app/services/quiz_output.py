@@ -0,0 +1,98 @@
+import json
+
+from pydantic import BaseModel, Field
+
+
+class QuestionOutput(BaseModel):
+    question_title: str
+    question_options: list[str] = Field(min_length=4, max_length=4)
+    answer: str
+
+
+class QuizOutput(BaseModel):
+    """
+    Shape of a generated quiz. Sent to Gemini as the response schema in structured output
+    mode and used to check the decoded response before the quiz specific rules.
+    """
+    title: str
+    description: str
+    questions: list[QuestionOutput] = Field(min_length=1)
+
+
+def decode_json_object(raw, max_candidates=5):
+    """
+    Decode the first JSON object in `raw`, tolerating code fences or text around it.
+
+    Decoding starts at an opening brace and stops at the end of the object, so the
+    scan is linear in the length of the response.
+    """
+    decoder = json.JSONDecoder()
+    start = raw.find("{")
+    error = ValueError("The response contains no JSON object.")
+    for _ in range(max_candidates):
+        if start == -1:
+            break
+        try:
+            return decoder.raw_decode(raw, start)[0]
+        except json.JSONDecodeError as exc:
+            error = exc
+        start = raw.find("{", start + 1)
+    raise error
+
+
+class QuizStreamParser:
+    """
+    Incremental scanner for a quiz JSON document that arrives in pieces.
+
+    `feed()` takes the next piece of text and returns the question objects that were
+    completed by it, so questions can be used before the response has finished.
+    Strings and escapes are tracked, so braces inside question texts are ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+
+    def _in_questions_array(self):
+        return (
+            len(self.stack) == 2
+            and self.stack[0][0] == "{"
+            and self.stack[1][0] == "["
+            and self.stack[1][2] == '"questions"'
+        )
+
+    def feed(self, piece):
+        self.text += piece
+        completed = []
+        text = self.text
+        while self.position < len(text):
+            char = text[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start:self.position + 1]
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.position
+            elif char in "{[":
+                # Inside an object the last complete string before a container is its key.
+                key = self.last_string if self.stack and self.stack[-1][0] == "{" else None
+                self.stack.append((char, self.position, key))
+            elif char in "}]" and self.stack:
+                _opener, start, _key = self.stack.pop()
+                if char == "}" and self._in_questions_array():
+                    try:
+                        completed.append(json.loads(text[start:self.position + 1]))
+                    except ValueError:
+                        pass
+            self.position += 1
+        return completed
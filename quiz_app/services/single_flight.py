@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from ..models import PipelineLease
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightError(Exception):
+    """
+    Raised in waiting callers when the run they were waiting for failed.
+    """
+
+
+class SingleFlightTimeout(Exception):
+    """
+    Raised when no result became available within SINGLE_FLIGHT_WAIT_SECONDS.
+    """
+
+
+def owner_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def _can_take_over(lease, now, seen_run_id):
+    if lease.status == PipelineLease.Status.RUNNING:
+        return lease.expires_at < now
+    if lease.status == PipelineLease.Status.DONE:
+        return lease.updated_at < now - timedelta(seconds=settings.SINGLE_FLIGHT_RESULT_TTL)
+    # A failed run is retried by new callers, but not by those who waited on it.
+    return lease.run_id != seen_run_id
+
+
+def acquire(key, seen_run_id=None):
+    """
+    Try to become the leader for `key`.
+
+    Returns (lease, True) for the leader. Everyone else gets (lease, False) with the
+    current lease row, or (None, False) if it vanished in the meantime. Leadership is
+    decided by the unique key on insert, or by a conditional update on run_id when an
+    expired, stale or failed lease is taken over, so only one process can win.
+    """
+    now = timezone.now()
+    run_id = uuid.uuid4().hex
+    expires_at = now + timedelta(seconds=settings.SINGLE_FLIGHT_LEASE_SECONDS)
+
+    try:
+        with transaction.atomic():
+            lease = PipelineLease.objects.create(key=key, run_id=run_id, owner=owner_id(), expires_at=expires_at)
+        return lease, True
+    except IntegrityError:
+        pass
+
+    lease = PipelineLease.objects.filter(key=key).first()
+    if lease is None or not _can_take_over(lease, now, seen_run_id):
+        return lease, False
+
+    taken = PipelineLease.objects.filter(pk=lease.pk, run_id=lease.run_id).update(
+        run_id=run_id,
+        owner=owner_id(),
+        status=PipelineLease.Status.RUNNING,
+        result=None,
+        error='',
+        expires_at=expires_at,
+        updated_at=now,
+    )
+    if not taken:
+        return PipelineLease.objects.filter(key=key).first(), False
+
+    lease.run_id, lease.status, lease.expires_at = run_id, PipelineLease.Status.RUNNING, expires_at
+    return lease, True
+
+
+def renew(lease):
+    """
+    Push the expiry of a running lease forward.
+    """
+    PipelineLease.objects.filter(pk=lease.pk, run_id=lease.run_id).update(
+        expires_at=timezone.now() + timedelta(seconds=settings.SINGLE_FLIGHT_LEASE_SECONDS),
+    )
+
+
+def complete(lease, result):
+    now = timezone.now()
+    PipelineLease.objects.filter(pk=lease.pk, run_id=lease.run_id).update(
+        status=PipelineLease.Status.DONE, result=result, updated_at=now,
+    )
+    # Finished leases past their result TTL are never reused, drop them while we are here.
+    PipelineLease.objects.exclude(status=PipelineLease.Status.RUNNING).filter(
+        updated_at__lt=now - timedelta(seconds=settings.SINGLE_FLIGHT_RESULT_TTL),
+    ).delete()
+
+
+def fail(lease, exc):
+    PipelineLease.objects.filter(pk=lease.pk, run_id=lease.run_id).update(
+        status=PipelineLease.Status.FAILED, error=f'{type(exc).__name__}: {exc}', updated_at=timezone.now(),
+    )
+
+
+@contextmanager
+def keep_alive(lease):
+    """
+    Renew `lease` from a background thread every third of SINGLE_FLIGHT_LEASE_SECONDS while
+    the block runs, so it only expires when the leader's process is gone, however long a
+    single stage such as the transcription takes.
+    """
+    stop = threading.Event()
+    interval = settings.SINGLE_FLIGHT_LEASE_SECONDS / 3
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                renew(lease)
+        except Exception:
+            logger.exception('Renewing the single-flight lease %s failed', lease.key)
+        finally:
+            connection.close()
+
+    threading.Thread(target=beat, name='single-flight-lease', daemon=True).start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def _check_waiting(lease, seen_run_id):
+    """
+    Return (done, result, run_id) for a lease seen by a waiting caller.
+    """
+    if lease is None:
+        return False, None, seen_run_id
+    if lease.status == PipelineLease.Status.DONE:
+        return True, lease.result, lease.run_id
+    if lease.status == PipelineLease.Status.FAILED and lease.run_id == seen_run_id:
+        raise SingleFlightError(lease.error)
+    return False, None, lease.run_id
+
+
+def run_once(key, compute):
+    """
+    Run `compute()` at most once at a time for `key` across all processes sharing the database.
+
+    The first caller becomes the leader and runs `compute`; concurrent callers poll the
+    lease row and receive the leader's result (which must be JSON serializable). Results
+    are reused for SINGLE_FLIGHT_RESULT_TTL seconds. The lease is renewed in the background
+    while the leader is working.
+    """
+    seen_run_id = None
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+
+    while True:
+        lease, leader = acquire(key, seen_run_id)
+        if leader:
+            try:
+                with keep_alive(lease):
+                    result = compute()
+            except Exception as exc:
+                fail(lease, exc)
+                raise
+            complete(lease, result)
+            return result
+
+        done, result, seen_run_id = _check_waiting(lease, seen_run_id)
+        if done:
+            logger.info('Reusing single-flight result for %s', key)
+            return result
+        if time.monotonic() > deadline:
+            raise SingleFlightTimeout(f'No result for {key} within {settings.SINGLE_FLIGHT_WAIT_SECONDS}s')
+        time.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
+
+
+async def arun_once(key, compute):
+    """
+    Async variant of `run_once`; `compute` must be a coroutine function.
+    """
+    seen_run_id = None
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+
+    while True:
+        lease, leader = await sync_to_async(acquire)(key, seen_run_id)
+        if leader:
+            try:
+                with keep_alive(lease):
+                    result = await compute()
+            except Exception as exc:
+                await sync_to_async(fail)(lease, exc)
+                raise
+            await sync_to_async(complete)(lease, result)
+            return result
+
+        done, result, seen_run_id = _check_waiting(lease, seen_run_id)
+        if done:
+            logger.info('Reusing single-flight result for %s', key)
+            return result
+        if time.monotonic() > deadline:
+            raise SingleFlightTimeout(f'No result for {key} within {settings.SINGLE_FLIGHT_WAIT_SECONDS}s')
+        await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
@@ -0,0 +1,90 @@
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import Transcript
+
+logger = logging.getLogger(__name__)
+
+
+def get(video_id, model_name):
+    """
+    Return the cached segments for `video_id` transcribed with `model_name`, or None on a miss.
+    Expired entries are deleted on access.
+    """
+    if not settings.TRANSCRIPT_CACHE_ENABLED:
+        return None
+
+    entry = Transcript.objects.filter(video_id=video_id, model_name=model_name).first()
+    if entry is None:
+        return None
+
+    now = timezone.now()
+    if entry.created_at < now - timedelta(seconds=settings.TRANSCRIPT_CACHE_TTL):
+        entry.delete()
+        return None
+
+    Transcript.objects.filter(pk=entry.pk).update(last_accessed_at=now, hits=F('hits') + 1)
+    logger.info('Transcript cache hit for %s (%s)', video_id, model_name)
+    return entry.segments
+
+
+def put(video_id, model_name, segments, model_version='', language=''):
+    """
+    Store the segments of a fresh transcription and evict old entries if the cache is over its limits.
+    """
+    if not settings.TRANSCRIPT_CACHE_ENABLED:
+        return
+
+    size_bytes = len(json.dumps(segments).encode('utf-8'))
+    try:
+        with transaction.atomic():
+            Transcript.objects.update_or_create(
+                video_id=video_id,
+                model_name=model_name,
+                defaults={
+                    'model_version': model_version,
+                    'language': language or '',
+                    'segments': segments,
+                    'size_bytes': size_bytes,
+                    'last_accessed_at': timezone.now(),
+                },
+            )
+    except IntegrityError:
+        # Another worker stored the same transcript at the same moment.
+        return
+
+    evict()
+
+
+def evict():
+    """
+    Delete expired entries, then the least recently used ones until the cache fits
+    TRANSCRIPT_CACHE_MAX_BYTES and TRANSCRIPT_CACHE_MAX_ENTRIES.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TRANSCRIPT_CACHE_TTL)
+    Transcript.objects.filter(created_at__lt=cutoff).delete()
+
+    totals = Transcript.objects.aggregate(size=Sum('size_bytes'))
+    total_size = totals['size'] or 0
+    total_count = Transcript.objects.count()
+    max_size = settings.TRANSCRIPT_CACHE_MAX_BYTES
+    max_count = settings.TRANSCRIPT_CACHE_MAX_ENTRIES
+    if total_size <= max_size and total_count <= max_count:
+        return
+
+    stale_ids = []
+    for entry_id, size in Transcript.objects.order_by('last_accessed_at').values_list('id', 'size_bytes').iterator():
+        if total_size <= max_size and total_count <= max_count:
+            break
+        stale_ids.append(entry_id)
+        total_size -= size
+        total_count -= 1
+
+    Transcript.objects.filter(id__in=stale_ids).delete()
+    logger.info('Evicted %d transcripts from the cache', len(stale_ids))
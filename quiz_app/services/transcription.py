@@ -0,0 +1,231 @@
+import threading
+from importlib import metadata
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .model_registry import registry
+
+FASTER_WHISPER_COMPUTE_TYPES = {'int8', 'int8_float16', 'int8_float32', 'int8_bfloat16', 'float16', 'bfloat16', 'float32', 'default'}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+class TranscriptionBackend:
+    """
+    Base class for speech-to-text engines.
+
+    A backend turns an audio file path or a 16 kHz mono float32 array into a list of
+    segments of the form {"start": float, "end": float, "text": str}, calling the optional
+    `on_segment(segment)` for each one as it is produced. Loaded models are kept in the
+    process-wide model registry.
+    """
+    name = None
+    package = None
+
+    def __init__(self, model_name, device='cpu', beam_size=5):
+        self.model_name = model_name
+        self.device = device
+        self.beam_size = beam_size
+
+    @property
+    def model_id(self):
+        """
+        Identifier of the backend and model, used to key cached transcripts.
+        """
+        return f'{self.name}/{self.model_name}'
+
+    @property
+    def version(self):
+        return metadata.version(self.package)
+
+    def registry_key(self):
+        return (self.name, self.model_name, self.device)
+
+    def load_model(self):
+        raise NotImplementedError
+
+    def get_model(self):
+        if settings.QUIZZLY_ROLE == 'api':
+            raise ImproperlyConfigured('The API role never loads ML models; quizzes are generated by run_quiz_worker.')
+        return registry.get(self.registry_key(), self.load_model)
+
+    def transcribe(self, audio, on_segment=None):
+        raise NotImplementedError
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """
+    Reference implementation on top of openai-whisper and PyTorch.
+    """
+    name = 'openai-whisper'
+    package = 'openai-whisper'
+
+    def load_model(self):
+        import whisper
+        return whisper.load_model(self.model_name, device=self.device)
+
+    def transcribe(self, audio, on_segment=None):
+        # openai-whisper only hands out its segments at the end, so progress jumps to done.
+        results = self.get_model().transcribe(
+            audio,
+            beam_size=self.beam_size,
+            fp16=self.device != 'cpu',
+        )
+        segments = [
+            {'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+            for segment in results['segments']
+        ]
+        if on_segment is not None and segments:
+            on_segment(segments[-1])
+        return segments
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    CTranslate2 based implementation from faster-whisper.
+
+    Supports quantized weights (`compute_type`, e.g. int8 on CPU), VAD filtering of
+    non-speech and an explicit number of CPU threads per model.
+    """
+    name = 'faster-whisper'
+    package = 'faster-whisper'
+
+    def __init__(self, model_name, device='cpu', beam_size=5, compute_type='int8', vad_filter=True, cpu_threads=0, num_workers=1):
+        super().__init__(model_name, device=device, beam_size=beam_size)
+        if compute_type not in FASTER_WHISPER_COMPUTE_TYPES:
+            raise ImproperlyConfigured(f'Unsupported faster-whisper compute type: {compute_type}')
+        self.compute_type = compute_type
+        self.vad_filter = vad_filter
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+
+    def registry_key(self):
+        return (self.name, self.model_name, self.device, self.compute_type, self.cpu_threads)
+
+    def load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            self.model_name,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+        )
+
+    def transcribe(self, audio, on_segment=None):
+        segments, _info = self.get_model().transcribe(
+            audio,
+            beam_size=self.beam_size,
+            vad_filter=self.vad_filter,
+        )
+        # The segments are decoded lazily, one at a time while iterating.
+        results = []
+        for segment in segments:
+            results.append({'start': segment.start, 'end': segment.end, 'text': segment.text})
+            if on_segment is not None:
+                on_segment(results[-1])
+        return results
+
+
+def shift_segments(segments, offset):
+    """
+    Move segment timestamps by `offset` seconds.
+    """
+    return [
+        {**segment, 'start': segment['start'] + offset, 'end': segment['end'] + offset}
+        for segment in segments
+    ]
+
+
+def transcribe_stream(backend, chunks, window_seconds=60):
+    """
+    Transcribe an iterable of 16 kHz float32 chunks window by window as they arrive.
+
+    Audio is collected until a window is full, cut at the quietest point near its end
+    and handed to the backend, so transcription of the first minute starts while the
+    rest is still being fetched. Yields lists of segments with timestamps relative to
+    the start of the stream.
+    """
+    import numpy as np
+    from .audio import SAMPLE_RATE, quietest_point
+
+    window_size = int(window_seconds * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0.0
+
+    for chunk in chunks:
+        buffer = np.concatenate([buffer, chunk])
+        while buffer.size >= window_size:
+            cut = quietest_point(buffer[:window_size])
+            yield shift_segments(backend.transcribe(buffer[:cut]), offset)
+            offset += cut / SAMPLE_RATE
+            buffer = buffer[cut:]
+
+    if buffer.size:
+        yield shift_segments(backend.transcribe(buffer), offset)
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_backend(name=None, **overrides):
+    """
+    Build the transcription backend selected by TRANSCRIPTION_BACKEND from settings.
+    Keyword arguments override individual backend options.
+    """
+    name = name or settings.TRANSCRIPTION_BACKEND
+    if name not in BACKENDS:
+        raise ImproperlyConfigured(f'Unknown transcription backend: {name}')
+
+    options = {
+        'device': settings.WHISPER_DEVICE,
+        'beam_size': settings.WHISPER_BEAM_SIZE,
+    }
+    if name == FasterWhisperBackend.name:
+        options.update(
+            compute_type=settings.FASTER_WHISPER_COMPUTE_TYPE,
+            vad_filter=settings.FASTER_WHISPER_VAD_FILTER,
+            cpu_threads=settings.FASTER_WHISPER_CPU_THREADS,
+            num_workers=settings.FASTER_WHISPER_NUM_WORKERS,
+        )
+    options.update(overrides)
+    return BACKENDS[name](settings.WHISPER_MODEL, **options)
+
+
+def create_pinned_backend(threads):
+    """
+    Build the configured backend limited to `threads` CPU threads, for dedicated worker processes.
+    """
+    overrides = {}
+    if settings.TRANSCRIPTION_BACKEND == FasterWhisperBackend.name:
+        overrides['cpu_threads'] = settings.FASTER_WHISPER_CPU_THREADS or threads
+    else:
+        import torch
+        torch.set_num_threads(threads)
+    return create_backend(**overrides)
+
+
+def set_backend(backend):
+    """
+    Replace the backend returned by `get_backend` in this process.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_backend():
+    """
+    Return the configured transcription backend, shared by all threads of this process.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
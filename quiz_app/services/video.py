@@ -0,0 +1,49 @@
+import re
+from urllib.parse import parse_qs, urlparse
+
+YOUTUBE_HOSTS = {
+    'youtube.com',
+    'www.youtube.com',
+    'm.youtube.com',
+    'music.youtube.com',
+    'youtube-nocookie.com',
+    'www.youtube-nocookie.com',
+}
+SHORT_HOSTS = {'youtu.be', 'www.youtu.be'}
+PATH_PREFIXES = ('shorts', 'embed', 'live', 'v')
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def extract_video_id(url):
+    """
+    Return the 11 character YouTube video id of `url`, or None for anything else.
+
+    Handles watch URLs (ignoring extra parameters like `t` and `list`), youtu.be
+    short links, and shorts/embed/live paths.
+    """
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    path_parts = [part for part in parsed.path.split('/') if part]
+
+    candidate = None
+    if host in SHORT_HOSTS and path_parts:
+        candidate = path_parts[0]
+    elif host in YOUTUBE_HOSTS:
+        if parsed.path == '/watch':
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in PATH_PREFIXES:
+            candidate = path_parts[1]
+
+    if candidate and VIDEO_ID_RE.match(candidate):
+        return candidate
+    return None
+
+
+def normalize_video_url(url):
+    """
+    Rewrite any YouTube link to its canonical watch URL; other URLs are returned unchanged.
+    """
+    video_id = extract_video_id(url)
+    if video_id is None:
+        return url
+    return f'https://www.youtube.com/watch?v={video_id}'
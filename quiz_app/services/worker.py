@@ -0,0 +1,51 @@
+import logging
+import signal
+import time
+
+from .processes import pin_threads, setup_django
+
+logger = logging.getLogger(__name__)
+
+REQUEUE_INTERVAL_SECONDS = 60
+
+
+def worker_main(index, threads, stop, concurrency):
+    """
+    Entry point of one `run_quiz_worker` process.
+
+    Pins the native thread pools to `threads`, loads the transcription model once and
+    then claims and runs queued quiz jobs until `stop` is set. `concurrency` is the
+    number of worker processes, which share the long audio process budget.
+    """
+    pin_threads(threads)
+    setup_django()
+    # The parent process handles Ctrl+C and tells the workers to stop after their current job.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from django.conf import settings
+    from django.db import close_old_connections
+    from .jobs import claim_next_job, requeue_stale_jobs, run_job
+    from .long_audio import set_job_workers
+    from .transcription import create_pinned_backend, set_backend
+
+    set_job_workers(concurrency)
+    backend = create_pinned_backend(threads)
+    set_backend(backend)
+    backend.get_model()
+    logger.info('Quiz worker %d ready with %s on %d threads', index, backend.model_id, threads)
+
+    last_requeue = 0.0
+    while not stop.is_set():
+        if index == 0 and time.monotonic() - last_requeue > REQUEUE_INTERVAL_SECONDS:
+            requeue_stale_jobs()
+            last_requeue = time.monotonic()
+
+        claimed = claim_next_job()
+        if claimed is None:
+            close_old_connections()
+            stop.wait(settings.QUIZ_WORKER_POLL_SECONDS)
+            continue
+
+        job_id, owner = claimed
+        logger.info('Quiz worker %d running job %s', index, job_id)
+        run_job(job_id, owner)
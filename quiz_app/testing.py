@@ -0,0 +1,60 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from .models import Quiz, Question
+
+
+def create_quizzes(user, count, questions_per_quiz=10):
+    """
+    Create `count` quizzes with questions for `user`, in a handful of queries.
+    """
+    quizzes = Quiz.objects.bulk_create([
+        Quiz(creator=user, title=f'Quiz {index}', description='Generated for tests', video_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        for index in range(count)
+    ])
+    Question.objects.bulk_create([
+        Question(
+            quiz=quiz,
+            question_title=f'Question {number}',
+            question_options=['A', 'B', 'C', 'D'],
+            answer='A',
+        )
+        for quiz in quizzes
+        for number in range(questions_per_quiz)
+    ])
+    return quizzes
+
+
+class QueryCountAssertionsMixin:
+    """
+    TestCase mixin that fails when the number of queries of a request grows with the data size.
+
+    Usage:
+        def test_list_is_constant(self):
+            self.assertQueryCountConstant(
+                lambda: self.client.get('/api/quizzes/'),
+                grow=lambda n: create_quizzes(self.user, n),
+                sizes=(1, 5, 25),
+            )
+    """
+
+    def count_queries(self, func, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            func()
+        return len(context.captured_queries), context.captured_queries
+
+    def assertQueryCountConstant(self, func, grow, sizes=(1, 10, 50), using=DEFAULT_DB_ALIAS):
+        """
+        Call `grow(n)` to add `n` more rows for each size, then run `func` and compare query counts.
+        """
+        counts = {}
+        existing = 0
+        for size in sizes:
+            grow(size - existing)
+            existing = size
+            counts[size], queries = self.count_queries(func, using=using)
+
+        if len(set(counts.values())) > 1:
+            details = ', '.join(f'{size} rows: {count} queries' for size, count in counts.items())
+            last_queries = '\n'.join(query['sql'] for query in queries)
+            self.fail(f'Query count grows with the number of rows ({details}).\nQueries for {sizes[-1]} rows:\n{last_queries}')
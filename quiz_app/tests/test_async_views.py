@@ -0,0 +1,49 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..services.llm import LLMGateway
+from ..testing import create_quizzes
+
+
+@override_settings(QUIZ_PAGE_SIZE=2)
+class AsyncQuizListTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        create_quizzes(self.user, 5, questions_per_quiz=1)
+
+    def test_pages_match_the_regular_list(self):
+        async_ids, sync_ids = [], []
+        for prefix, ids in (('/api/async/quizzes/', async_ids), ('/api/quizzes/', sync_ids)):
+            url = prefix
+            while url:
+                response = self.client.get(url, **self.headers)
+                self.assertEqual(response.status_code, 200)
+                body = response.json()
+                self.assertEqual(set(body), {'next', 'previous', 'results'})
+                ids.extend(quiz['id'] for quiz in body['results'])
+                url = body['next']
+        self.assertEqual(len(async_ids), 5)
+        self.assertEqual(async_ids, sync_ids)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/async/quizzes/?cursor=nonsense', **self.headers)
+        self.assertEqual(response.status_code, 404)
+
+
+class GatewayClientTests(SimpleTestCase):
+    def test_async_client_per_event_loop(self):
+        gateway = LLMGateway(api_key='test')
+
+        async def aio():
+            return gateway.aio, gateway.aio
+
+        with mock.patch.object(LLMGateway, '_create_client', side_effect=lambda: mock.Mock()):
+            first, same_loop = async_to_sync(aio)()
+            second, _same_loop = async_to_sync(aio)()
+        self.assertIs(first, same_loop)
+        self.assertIsNot(first, second)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.conf import settings
+from rest_framework.test import APITestCase
+
+from ..testing import create_quizzes
+
+
+class QuizConditionalCacheTests(APITestCase):
+    def setUp(self):
+        caches[settings.QUIZ_RESPONSE_CACHE].clear()
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.client.force_authenticate(self.user)
+        self.quiz = create_quizzes(self.user, 2, questions_per_quiz=3)[0]
+
+    def test_list_etag_and_not_modified(self):
+        response = self.client.get('/api/quizzes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        etag = response['ETag']
+
+        response = self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_links_follow_the_host(self):
+        create_quizzes(self.user, 30)
+        self.client.get('/api/quizzes/', HTTP_HOST='localhost')
+        response = self.client.get('/api/quizzes/', HTTP_HOST='127.0.0.1')
+        self.assertTrue(response.data['next'].startswith('http://127.0.0.1/'))
+
+    def test_detail_etag_changes_after_patch(self):
+        url = f'/api/quizzes/{self.quiz.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), 3)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.patch(url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_field_selection(self):
+        response = self.client.get('/api/quizzes/?fields=id,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_other_users_quiz_is_not_found(self):
+        other = get_user_model().objects.create_user(username='bob', password='secret')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/quizzes/{self.quiz.pk}/').status_code, 404)
@@ -0,0 +1,166 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Quiz, QuizJob
+from ..services import jobs
+from ..services.ingest import IngestRejected
+
+
+@override_settings(QUIZ_JOB_STALE_SECONDS=60)
+class JobOwnershipTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.job = QuizJob.objects.create(creator=self.user, video_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+
+    def test_job_is_claimed_once(self):
+        job_id, owner = jobs.claim_next_job()
+        self.assertEqual(job_id, self.job.pk)
+        self.assertIsNone(jobs.claim_job(self.job.pk))
+        self.assertIsNone(jobs.claim_next_job())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.RUNNING)
+        self.assertEqual(self.job.owner, owner)
+
+    def test_only_jobs_without_heartbeat_are_requeued(self):
+        jobs.claim_job(self.job.pk)
+        self.assertEqual(jobs.requeue_stale_jobs(), [])
+
+        QuizJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale_jobs(), [self.job.pk])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.PENDING)
+        self.assertEqual(self.job.owner, '')
+
+    def test_result_is_recorded_by_the_owner(self):
+        quiz = Quiz.objects.create(creator=self.user, title='Quiz')
+        with mock.patch('quiz_app.services.pipeline.run_pipeline', return_value=quiz):
+            self.assertEqual(jobs.run_job(self.job.pk), quiz.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.SUCCEEDED)
+        self.assertEqual(self.job.quiz, quiz)
+
+    def test_result_of_a_requeued_job_is_discarded(self):
+        quiz = Quiz.objects.create(creator=self.user, title='Quiz')
+        owner = jobs.claim_job(self.job.pk)
+
+        def taken_over(*args, **kwargs):
+            QuizJob.objects.filter(pk=self.job.pk).update(owner='other-worker')
+            return quiz
+
+        with mock.patch('quiz_app.services.pipeline.run_pipeline', side_effect=taken_over):
+            self.assertIsNone(jobs.run_job(self.job.pk, owner))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.RUNNING)
+        self.assertFalse(Quiz.objects.filter(pk=quiz.pk).exists())
+
+
+class BrokenPoolTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.job = QuizJob.objects.create(creator=self.user, video_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+
+    def broken_future(self):
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+        return future
+
+    @override_settings(QUIZ_JOB_DISPATCH='local')
+    def test_broken_pool_is_replaced_on_submit(self):
+        broken, fresh = mock.Mock(), mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool('worker died')
+        fresh.submit.return_value = Future()
+        with mock.patch.object(jobs, 'get_executor', side_effect=[broken, fresh]), \
+                mock.patch.object(jobs, '_discard_executor') as discard:
+            jobs.submit_job(self.job.pk)
+        discard.assert_called_once_with(broken)
+        owner = fresh.submit.call_args.args[2]
+        fresh.submit.assert_called_once_with(jobs.run_job, self.job.pk, owner, claim=True)
+
+    def test_running_job_of_a_broken_pool_fails(self):
+        owner = jobs.claim_job(self.job.pk)
+        with mock.patch.object(jobs, '_discard_executor'), mock.patch('django.db.connection.close'):
+            jobs._job_done(self.job.pk, owner, mock.Mock(), self.broken_future())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.FAILED)
+
+    def test_job_claimed_by_another_worker_is_not_failed(self):
+        jobs.claim_job(self.job.pk, 'other-worker')
+        with mock.patch.object(jobs, '_discard_executor'), mock.patch('django.db.connection.close'):
+            jobs._job_done(self.job.pk, 'broken-pool', mock.Mock(), self.broken_future())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.RUNNING)
+        self.assertEqual(self.job.owner, 'other-worker')
+
+    def test_pending_job_of_a_broken_pool_is_resubmitted(self):
+        with mock.patch.object(jobs, '_discard_executor'), mock.patch.object(jobs, 'submit_job') as submit, \
+                mock.patch('django.db.connection.close'):
+            jobs._job_done(self.job.pk, 'broken-pool', mock.Mock(), self.broken_future())
+        submit.assert_called_once_with(self.job.pk)
+
+    @override_settings(QUIZ_JOB_STALE_SECONDS=60)
+    def test_only_old_pending_jobs_are_recovered(self):
+        old = QuizJob.objects.create(creator=self.user, video_url='https://www.youtube.com/watch?v=9bZkp7q5slI')
+        QuizJob.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+        with mock.patch.object(jobs, 'submit_job') as submit:
+            self.assertEqual(jobs.recover_jobs(pending=True), [old.pk])
+        submit.assert_called_once_with(old.pk)
+
+
+@override_settings(QUIZ_JOB_DISPATCH='queue')
+class PlaylistBatchTests(TestCase):
+    playlist_url = 'https://www.youtube.com/playlist?list=PL123'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+
+    def test_playlist_is_read_by_a_job(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('quiz_app.services.ingest.expand_playlist') as expand_playlist:
+            response = client.post('/api/createQuiz/batch/', {'playlist_url': self.playlist_url}, format='json')
+        expand_playlist.assert_not_called()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['playlist'], {'status': QuizJob.Status.PENDING, 'error': ''})
+        self.assertEqual(response.data['jobs'], [])
+
+    def test_playlist_job_adds_the_videos(self):
+        batch = jobs.create_playlist_batch(self.user, self.playlist_url)
+        playlist_job = batch.jobs.get()
+        urls = ['https://youtu.be/dQw4w9WgXcQ', 'https://www.youtube.com/watch?v=9bZkp7q5slI']
+        with mock.patch('quiz_app.services.ingest.expand_playlist', return_value=('Playlist', urls)):
+            video_job_ids = jobs.run_job(playlist_job.pk)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.title, 'Playlist')
+        video_jobs = QuizJob.objects.filter(pk__in=video_job_ids).order_by('pk')
+        self.assertEqual(
+            [job.video_url for job in video_jobs],
+            ['https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://www.youtube.com/watch?v=9bZkp7q5slI'],
+        )
+        self.assertTrue(all(job.status == QuizJob.Status.PENDING and job.batch_id == batch.pk for job in video_jobs))
+        playlist_job.refresh_from_db()
+        self.assertEqual(playlist_job.status, QuizJob.Status.SUCCEEDED)
+
+    def test_unreadable_playlist_fails_the_job(self):
+        batch = jobs.create_playlist_batch(self.user, self.playlist_url)
+        playlist_job = batch.jobs.get()
+        with mock.patch('quiz_app.services.ingest.expand_playlist', side_effect=IngestRejected('The playlist has no videos.')):
+            self.assertEqual(jobs.run_job(playlist_job.pk), [])
+        playlist_job.refresh_from_db()
+        self.assertEqual(playlist_job.status, QuizJob.Status.FAILED)
+        self.assertEqual(playlist_job.error, 'IngestRejected: The playlist has no videos.')
+        self.assertFalse(QuizJob.objects.filter(kind=QuizJob.Kind.VIDEO).exists())
+
+    def test_created_video_jobs_are_submitted_by_the_pool_owner(self):
+        future = Future()
+        future.set_result([11, 12])
+        with mock.patch.object(jobs, 'submit_job') as submit_job:
+            jobs._job_done(1, 'owner', mock.Mock(), future)
+        self.assertEqual(submit_job.call_args_list, [mock.call(11), mock.call(12)])
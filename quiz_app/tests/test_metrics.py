@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from ..services.metrics import MetricsRegistry, discard, merge, registry, render
+from ..services.model_registry import ModelRegistry
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    def test_disabled_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_DIR='', METRICS_TOKEN='secret')
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('quizzly_pipeline_runs_total', response.content.decode())
+
+
+class MetricsFileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write(self, pid):
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as file:
+            file.write('{}')
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_prune_removes_files_of_exited_processes(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        self.write(exited.pid)
+        self.write(os.getppid())
+        self.write(os.getpid())
+
+        MetricsRegistry().prune()
+
+        self.assertEqual(self.files(), [f'{os.getppid()}.json'])
+
+    def test_own_file_is_kept_once_written(self):
+        registry = MetricsRegistry()
+        registry.flush()
+        registry.prune()
+        self.assertEqual(self.files(), [f'{os.getpid()}.json'])
+
+        discard(os.getpid())
+        self.assertEqual(self.files(), [])
+
+
+@override_settings(METRICS_DIR='')
+class ModelMetricsTests(SimpleTestCase):
+    def test_model_loads_are_exported_as_gauges(self):
+        ModelRegistry().get(('test', 'tiny', 'cpu'), lambda: object())
+
+        output = render(registry.snapshot())
+        self.assertIn('# TYPE quizzly_models_loaded gauge', output)
+        self.assertIn('quizzly_models_loaded{model="test/tiny/cpu"} 1', output)
+        self.assertIn('quizzly_model_memory_bytes{model="test/tiny/cpu"}', output)
+
+    def test_gauges_of_processes_are_added_up(self):
+        snapshot = {'quizzly_models_loaded': {'type': 'gauge', 'help': '', 'labels': ['model'], 'values': [[['base'], 1]]}}
+        self.assertEqual(merge([snapshot, snapshot])['quizzly_models_loaded']['values'], [[['base'], 2]])
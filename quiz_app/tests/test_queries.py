@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.conf import settings
+from rest_framework.test import APITestCase
+
+from ..models import Question
+from ..testing import QueryCountAssertionsMixin, create_quizzes
+
+
+class QuizQueryCountTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        caches[settings.QUIZ_RESPONSE_CACHE].clear()
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        # A cached body would hide the queries of the view itself.
+        caches[settings.QUIZ_RESPONSE_CACHE].clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_is_constant(self):
+        self.assertQueryCountConstant(
+            lambda: self.get('/api/quizzes/'),
+            grow=lambda n: create_quizzes(self.user, n, questions_per_quiz=3),
+            sizes=(1, 5, 20),
+        )
+
+    def test_detail_is_constant(self):
+        quiz = create_quizzes(self.user, 1, questions_per_quiz=1)[0]
+        url = f'/api/quizzes/{quiz.pk}/'
+        self.assertQueryCountConstant(
+            lambda: self.get(url),
+            grow=lambda n: create_quizzes(self.user, n, questions_per_quiz=3),
+            sizes=(1, 5, 20),
+        )
+
+    def test_detail_is_constant_in_questions(self):
+        quiz = create_quizzes(self.user, 1, questions_per_quiz=1)[0]
+        url = f'/api/quizzes/{quiz.pk}/'
+        one, _queries = self.count_queries(lambda: self.get(url))
+        Question.objects.bulk_create([
+            Question(quiz=quiz, question_title=f'Extra {number}', question_options=['A', 'B', 'C', 'D'], answer='A')
+            for number in range(20)
+        ])
+        many, _queries = self.count_queries(lambda: self.get(url))
+        self.assertEqual(one, many)
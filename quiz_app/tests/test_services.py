@@ -0,0 +1,235 @@
+import copy
+import json
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ..services import pipeline
+from ..services.audio import SAMPLE_RATE
+from ..services.generation import GenerationStats, InvalidQuizData, complete_quiz, validate_quiz_data
+from ..services.ingest import IngestRejected
+from ..services.long_audio import is_long_audio, plan_windows, pool_size, stitch
+from ..services.preprocessing import TimeMap
+from ..services.quiz_output import QuizStreamParser
+from ..services.video import extract_video_id
+
+VALID_QUIZ = {
+    'title': 'Quiz',
+    'description': 'About the video',
+    'questions': [
+        {'question_title': 'Which one?', 'question_options': ['A', 'B', 'C', 'D'], 'answer': 'B'},
+    ],
+}
+
+
+class ExtractVideoIdTests(SimpleTestCase):
+    def test_supported_urls(self):
+        for url in (
+            'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+            'https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s&list=PL123',
+            ' https://m.youtube.com/watch?v=dQw4w9WgXcQ ',
+            'https://youtu.be/dQw4w9WgXcQ?si=abc',
+            'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+            'https://www.youtube.com/embed/dQw4w9WgXcQ',
+            'https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ',
+            'https://www.youtube.com/live/dQw4w9WgXcQ',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(extract_video_id(url), 'dQw4w9WgXcQ')
+
+    def test_rejected_urls(self):
+        for url in (
+            '',
+            'not a url',
+            'https://example.com/watch?v=dQw4w9WgXcQ',
+            'https://www.youtube.com/watch?v=short',
+            'https://www.youtube.com/watch',
+            'https://www.youtube.com/channel/UC1234567890',
+            'https://youtu.be/',
+        ):
+            with self.subTest(url=url):
+                self.assertIsNone(extract_video_id(url))
+
+
+class TranscriptKeyTests(SimpleTestCase):
+    def test_ranges_are_keyed_in_milliseconds(self):
+        self.assertEqual(pipeline.transcript_key('dQw4w9WgXcQ', None), 'dQw4w9WgXcQ')
+        self.assertEqual(pipeline.transcript_key('dQw4w9WgXcQ', (None, 90.5)), 'dQw4w9WgXcQ@0-90500')
+        self.assertEqual(pipeline.transcript_key('dQw4w9WgXcQ', (3600, None)), 'dQw4w9WgXcQ@3600000-')
+        self.assertNotEqual(
+            pipeline.transcript_key('dQw4w9WgXcQ', (1234567.1, None)),
+            pipeline.transcript_key('dQw4w9WgXcQ', (1234567.2, None)),
+        )
+        self.assertLessEqual(len(pipeline.transcript_key('dQw4w9WgXcQ', (1e7, 2e7))), 64)
+
+
+class ValidateQuizDataTests(SimpleTestCase):
+    def test_valid_quiz(self):
+        validate_quiz_data(VALID_QUIZ)
+
+    def test_invalid_quizzes(self):
+        def changed(change):
+            quiz_data = copy.deepcopy(VALID_QUIZ)
+            change(quiz_data)
+            return quiz_data
+
+        cases = {
+            'not an object': [],
+            'missing title': changed(lambda q: q.pop('title')),
+            'blank description': changed(lambda q: q.update(description='  ')),
+            'long title': changed(lambda q: q.update(title='x' * 256)),
+            'no questions': changed(lambda q: q.update(questions=[])),
+            'three options': changed(lambda q: q['questions'][0].update(question_options=['A', 'B', 'C'])),
+            'duplicate options': changed(lambda q: q['questions'][0].update(question_options=['A', 'A', 'C', 'D'])),
+            'answer not an option': changed(lambda q: q['questions'][0].update(answer='E')),
+            'question not an object': changed(lambda q: q['questions'].append('Which one?')),
+        }
+        for name, quiz_data in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(InvalidQuizData):
+                    validate_quiz_data(quiz_data)
+
+
+class CompleteQuizTests(SimpleTestCase):
+    @override_settings(GENERATION_REPAIR_ATTEMPTS=2)
+    def test_every_repair_attempt_is_counted(self):
+        responses = iter(['not json', '{"title": ""}', json.dumps(VALID_QUIZ)])
+        stats = GenerationStats('single', 100)
+
+        def request_quiz(prompt, stats, on_question=None):
+            stats.add_usage({'input_tokens': 10, 'output_tokens': 5})
+            return next(responses)
+
+        ticks = iter(range(100))
+        with mock.patch('quiz_app.services.generation.request_quiz', side_effect=request_quiz), \
+                mock.patch('quiz_app.services.generation.time.perf_counter', side_effect=lambda: next(ticks)):
+            self.assertEqual(complete_quiz('prompt', stats)['title'], 'Quiz')
+
+        self.assertEqual(stats.data['repairs'], 2)
+        self.assertEqual(stats.data['llm_calls'], 3)
+        self.assertEqual(stats.data['timings']['repair'], 2)
+        self.assertEqual(stats.data['timings']['parse'], 3)
+
+
+class QuizStreamParserTests(SimpleTestCase):
+    def feed_in_pieces(self, text, size):
+        parser = QuizStreamParser()
+        completed = []
+        for index in range(0, len(text), size):
+            completed.extend(parser.feed(text[index:index + size]))
+        return completed
+
+    def test_questions_are_completed_across_pieces(self):
+        text = json.dumps({
+            'title': 'Quiz {with} [brackets]',
+            'description': 'A "quoted" } brace',
+            'questions': [
+                {'question_title': 'Is {this} a brace?', 'question_options': ['}', '{', ']', '['], 'answer': '}'},
+                {'question_title': 'Escaped \\" quote', 'question_options': ['A', 'B', 'C', 'D'], 'answer': 'A'},
+            ],
+        })
+        for size in (1, 7, len(text)):
+            with self.subTest(size=size):
+                self.assertEqual(self.feed_in_pieces(text, size), json.loads(text)['questions'])
+
+    def test_objects_outside_questions_are_ignored(self):
+        text = '```json\n{"meta": {"a": 1}, "other": [{"b": 2}], "questions": [{"question_title": "Q"}]}\n```'
+        self.assertEqual(self.feed_in_pieces(text, 5), [{'question_title': 'Q'}])
+
+
+class LongAudioWindowTests(SimpleTestCase):
+    def test_windows_cut_at_silence_and_overlap(self):
+        samples = np.ones(100 * SAMPLE_RATE, dtype=np.float32)
+        samples[48 * SAMPLE_RATE:int(48.5 * SAMPLE_RATE)] = 0
+
+        windows = plan_windows(samples, window_seconds=40, overlap_seconds=1, search_seconds=10)
+
+        core = [(core_start, core_end) for _start, _end, core_start, core_end in windows]
+        self.assertEqual(core[0][0], 0)
+        self.assertEqual(core[-1][1], samples.size)
+        for (_, previous_end), (next_start, _) in zip(core, core[1:]):
+            self.assertEqual(previous_end, next_start)
+        self.assertTrue(48 * SAMPLE_RATE <= core[0][1] < 48.5 * SAMPLE_RATE)
+        start, end, core_start, core_end = windows[1]
+        self.assertEqual((core_start - start, end - core_end), (SAMPLE_RATE, SAMPLE_RATE))
+
+    def test_short_audio_is_one_window(self):
+        samples = np.ones(10 * SAMPLE_RATE, dtype=np.float32)
+        self.assertEqual(plan_windows(samples, 40, 1), [(0, samples.size, 0, samples.size)])
+
+    def test_stitch_keeps_each_overlap_segment_once(self):
+        windows = [(0, 11 * SAMPLE_RATE, 0, 10 * SAMPLE_RATE), (9 * SAMPLE_RATE, 20 * SAMPLE_RATE, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE)]
+        results = [
+            [{'start': 0, 'end': 5, 'text': 'one'}, {'start': 8, 'end': 11, 'text': 'two'}],
+            [{'start': 9, 'end': 10.5, 'text': 'two'}, {'start': 9.5, 'end': 11, 'text': ' three'}, {'start': 12, 'end': 15, 'text': 'three'}],
+        ]
+        self.assertEqual([segment['text'] for segment in stitch(windows, results)], ['one', 'two', ' three'])
+
+    @override_settings(LONG_AUDIO_PROCESSES=4, QUIZ_JOB_WORKERS=2, LONG_AUDIO_THRESHOLD_SECONDS=900)
+    def test_process_budget_is_shared_by_job_workers(self):
+        self.assertEqual(pool_size(), 2)
+        self.assertTrue(is_long_audio(1000))
+        with self.settings(QUIZ_JOB_WORKERS=4):
+            self.assertEqual(pool_size(), 1)
+            self.assertFalse(is_long_audio(1000))
+
+
+class TimeMapTests(SimpleTestCase):
+    def test_maps_through_removed_silence_and_speed(self):
+        time_map = TimeMap([(2.0, 5.0), (10.0, 12.0)], speed=2.0)
+        self.assertEqual(time_map.to_original(0), 2.0)
+        self.assertEqual(time_map.to_original(1), 4.0)
+        self.assertEqual(time_map.to_original(2), 11.0)
+        self.assertEqual(time_map.to_original(10), 12.0)
+
+    def test_without_spans_only_speed_applies(self):
+        self.assertEqual(TimeMap([], speed=1.5).to_original(4), 6.0)
+
+    def test_map_segments(self):
+        time_map = TimeMap([(5.0, 10.0)])
+        self.assertEqual(
+            time_map.map_segments([{'start': 1.0, 'end': 2.0, 'text': 'hi'}]),
+            [{'start': 6.0, 'end': 7.0, 'text': 'hi'}],
+        )
+
+
+@override_settings(AUDIO_PREPROCESSING=True, STREAMING_WINDOW_SECONDS=60)
+class PreprocessedTranscriptionTests(SimpleTestCase):
+    info = {'url': 'https://media.example/audio', 'duration': 2}
+
+    def preprocess_keeping(self, speech):
+        def preprocess(samples):
+            if not speech:
+                return np.zeros(0, dtype=np.float32), TimeMap([]), {}
+            return samples[SAMPLE_RATE // 2:], TimeMap([(0.5, samples.size / SAMPLE_RATE)]), {}
+        return preprocess
+
+    def stream(self, preprocess):
+        backend = mock.Mock()
+        backend.transcribe.return_value = [{'start': 0.0, 'end': 0.5, 'text': 'hi'}]
+        chunks = [np.zeros(SAMPLE_RATE, dtype=np.float32), np.zeros(SAMPLE_RATE, dtype=np.float32)]
+        with mock.patch.object(pipeline, 'get_backend', return_value=backend), \
+                mock.patch.object(pipeline, 'decode_stream', return_value=chunks), \
+                mock.patch.object(pipeline, 'prefetch', side_effect=lambda chunks: chunks), \
+                mock.patch.object(pipeline, 'preprocess', side_effect=preprocess):
+            return pipeline.stream_transcript(self.info, lambda stage, progress: None), backend
+
+    def test_streamed_windows_are_preprocessed(self):
+        segments, backend = self.stream(self.preprocess_keeping(speech=True))
+        self.assertEqual(backend.transcribe.call_args.args[0].size, 3 * SAMPLE_RATE // 2)
+        self.assertEqual(segments, [{'start': 0.5, 'end': 1.0, 'text': 'hi'}])
+
+    def test_stream_without_speech_is_rejected(self):
+        with self.assertRaisesMessage(IngestRejected, 'No speech'):
+            self.stream(self.preprocess_keeping(speech=False))
+
+    def test_download_without_speech_is_rejected(self):
+        backend = mock.Mock()
+        with mock.patch.object(pipeline, 'get_backend', return_value=backend), \
+                mock.patch.object(pipeline, 'audio_duration', return_value=2.0), \
+                mock.patch.object(pipeline, 'load_audio', return_value=np.zeros(2 * SAMPLE_RATE, dtype=np.float32)), \
+                mock.patch.object(pipeline, 'preprocess', side_effect=self.preprocess_keeping(speech=False)), \
+                self.assertRaisesMessage(IngestRejected, 'No speech'):
+            pipeline.transcribe_audio('audio.wav')
+        backend.transcribe.assert_not_called()
@@ -0,0 +1,40 @@
+import time
+
+from django.test import TransactionTestCase, override_settings
+
+from ..models import PipelineLease
+from ..services import single_flight
+
+
+@override_settings(SINGLE_FLIGHT_LEASE_SECONDS=0.3, SINGLE_FLIGHT_RESULT_TTL=60)
+class SingleFlightTests(TransactionTestCase):
+    def test_lease_is_renewed_while_the_leader_works(self):
+        expiries = []
+
+        def compute():
+            expiries.append(PipelineLease.objects.get(key='video').expires_at)
+            time.sleep(0.5)
+            expiries.append(PipelineLease.objects.get(key='video').expires_at)
+            return {'quiz': 1}
+
+        self.assertEqual(single_flight.run_once('video', compute), {'quiz': 1})
+        self.assertGreater(expiries[1], expiries[0])
+
+    def test_finished_result_is_reused(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'quiz': len(calls)}
+
+        self.assertEqual(single_flight.run_once('video', compute), {'quiz': 1})
+        self.assertEqual(single_flight.run_once('video', compute), {'quiz': 1})
+        self.assertEqual(len(calls), 1)
+
+    def test_failure_is_recorded(self):
+        def compute():
+            raise ValueError('no audio')
+
+        with self.assertRaises(ValueError):
+            single_flight.run_once('video', compute)
+        self.assertEqual(PipelineLease.objects.get(key='video').status, PipelineLease.Status.FAILED)
@@ -0,0 +1,133 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.test import APITestCase
+
+from ..api.streaming import job_events
+from ..models import Question, Quiz, QuizJob
+from ..services.pipeline import IncrementalQuiz, percent_reporter
+
+QUESTIONS = [
+    {'question_title': f'Question {number}', 'question_options': ['A', 'B', 'C', 'D'], 'answer': 'A'}
+    for number in range(1, 4)
+]
+
+
+def parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        for message in chunk.split('\n\n'):
+            if message.startswith('event: '):
+                event, data = message.split('\n', 1)
+                events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class IncrementalQuizTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+
+    def test_quiz_is_hidden_until_finished(self):
+        incremental = IncrementalQuiz(self.user, 'https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        incremental.add(QUESTIONS[0])
+        self.assertFalse(incremental.quiz.ready)
+
+        quiz = incremental.finish({'title': 'Quiz', 'description': 'About it', 'questions': QUESTIONS})
+        quiz.refresh_from_db()
+        self.assertTrue(quiz.ready)
+        self.assertEqual(list(quiz.questions.order_by('id').values_list('question_title', flat=True)),
+                         ['Question 1', 'Question 2', 'Question 3'])
+
+    def test_repaired_questions_replace_the_streamed_ones(self):
+        incremental = IncrementalQuiz(self.user, 'https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        incremental.add({**QUESTIONS[0], 'question_title': 'Broken'})
+        quiz = incremental.finish({'title': 'Quiz', 'description': 'About it', 'questions': QUESTIONS})
+        self.assertEqual(quiz.questions.count(), 3)
+        self.assertFalse(quiz.questions.filter(question_title='Broken').exists())
+
+    def test_unfinished_quiz_is_not_listed(self):
+        Quiz.objects.create(creator=self.user, title='', ready=False)
+        client = APITestCase.client_class()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/quizzes/').data['results'], [])
+
+    def test_percent_reporter_skips_repeated_values(self):
+        reports = []
+        on_progress = percent_reporter(lambda stage, progress: reports.append(progress), 'transcribing', 30, 35)
+        for fraction in (0.0, 0.01, 0.5, 0.51, 1.0):
+            on_progress(fraction)
+        self.assertEqual(reports, [30, 47, 65])
+
+
+def collect(events):
+    async def consume():
+        return [message async for message in events]
+
+    return parse_events(async_to_sync(consume)())
+
+
+@override_settings(QUIZ_STREAM_POLL_SECONDS=0)
+class JobEventsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+
+    def test_finished_job_streams_questions_and_quiz(self):
+        quiz = Quiz.objects.create(creator=self.user, title='Quiz')
+        Question.objects.bulk_create([Question(quiz=quiz, **question) for question in QUESTIONS[:2]])
+        job = QuizJob.objects.create(
+            creator=self.user, status=QuizJob.Status.SUCCEEDED, stage=QuizJob.Stage.DONE, progress=100, quiz=quiz,
+        )
+
+        async def load_quiz(quiz_id):
+            return {'id': quiz_id}
+
+        events = collect(job_events(job.pk, load_quiz))
+        self.assertEqual([event for event, _data in events], ['stage', 'question', 'question', 'quiz'])
+        self.assertEqual(events[2][1]['index'], 2)
+        self.assertEqual(events[3][1], {'id': quiz.pk})
+
+    def test_succeeded_job_without_quiz_streams_error(self):
+        job = QuizJob.objects.create(creator=self.user, status=QuizJob.Status.SUCCEEDED, stage=QuizJob.Stage.DONE)
+        events = collect(job_events(job.pk, load_quiz=None))
+        self.assertEqual(events[-1], ('error', {'detail': 'The quiz of this job no longer exists.'}))
+
+    def test_failed_job_streams_error(self):
+        job = QuizJob.objects.create(creator=self.user, status=QuizJob.Status.FAILED, error='IngestRejected: too long')
+        events = collect(job_events(job.pk, load_quiz=None))
+        self.assertEqual(events[-1], ('error', {'detail': 'IngestRejected: too long'}))
+
+
+class QuizStreamViewTests(TestCase):
+    url = '/api/createQuiz/stream/'
+    body = {'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='secret')
+        self.authorization = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def test_wsgi_is_refused(self):
+        response = self.client.post(
+            self.url, self.body, content_type='application/json', HTTP_AUTHORIZATION=self.authorization,
+        )
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(QuizJob.objects.exists())
+
+    async def test_asgi_streams_the_queued_job(self):
+        async def events(job_id, load_quiz):
+            yield f'event: job\ndata: {job_id}\n\n'
+
+        with mock.patch('quiz_app.api.async_views.submit_job') as submit_job, \
+                mock.patch('quiz_app.api.async_views.job_events', events):
+            response = await self.async_client.post(
+                self.url, self.body, content_type='application/json', AUTHORIZATION=self.authorization,
+            )
+            content = [chunk async for chunk in response.streaming_content]
+
+        job = await QuizJob.objects.aget()
+        submit_job.assert_called_once_with(job.pk)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(b''.join(content).decode(), f'event: job\ndata: {job.pk}\n\n')